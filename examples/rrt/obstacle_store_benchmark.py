@@ -0,0 +1,49 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+import time
+
+import numpy as np
+
+from src.search_space.search_space import SearchSpace
+
+# 장애물 개수를 늘려가면서 rtree와 numpy 배열 중 어느 쪽이 빠른지 비교한다.
+obstacle_counts = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024]
+n_queries = 2000  # number of points and of segments to check per measurement
+edge_length = 8  # length of checked segments, same as the example Q
+
+rng = np.random.default_rng(0)
+
+
+def random_obstacles(dimensions, n):
+    lower = rng.uniform(0, 95, (n, dimensions))
+    return np.hstack([lower, lower + rng.uniform(1, 5, (n, dimensions))])
+
+
+def time_queries(X, points, starts, ends):
+    t = time.perf_counter()
+    for x in points:
+        X.obstacle_free(x)
+    for start, end in zip(starts, ends):
+        X.collision_free(start, end)
+    return time.perf_counter() - t
+
+
+for dimensions in (2, 3):
+    X_dimensions = np.array([(0, 100)] * dimensions)
+    points = [tuple(x) for x in rng.uniform(0, 100, (n_queries, dimensions))]
+    starts = rng.uniform(0, 100, (n_queries, dimensions))
+    directions = rng.normal(size=(n_queries, dimensions))
+    ends = starts + edge_length * directions / np.linalg.norm(directions, axis=1)[:, None]
+    starts, ends = [tuple(x) for x in starts], [tuple(x) for x in ends]
+
+    print("{}D: {:>9} {:>10} {:>10}".format(dimensions, "obstacles", "rtree (s)", "array (s)"))
+    crossover = None
+    for n in obstacle_counts:
+        Obstacles = random_obstacles(dimensions, n)
+        # edge cache off so every query reaches the obstacle store
+        times = [time_queries(SearchSpace(X_dimensions, Obstacles, edge_cache_size=0, obstacle_store=store),
+                              points, starts, ends) for store in ("rtree", "array")]
+        if crossover is None and times[1] > times[0]:
+            crossover = n
+        print("    {:>9} {:>10.4f} {:>10.4f}".format(n, *times))
+    print("    r-tree store is faster from {} obstacles on\n".format(crossover))
@@ -0,0 +1,39 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+import os
+import tempfile
+
+import numpy as np
+
+from src.rrt.batch import plan_batch
+from src.search_space.search_space import SearchSpace
+
+# 메모리 맵 그리드 파일 하나를 여러 프로세스가 같이 쓰면서 질의를 한꺼번에 풀고,
+# 돌려받은 경로가 장애물을 지나지 않는지 r-tree로 다시 확인한다.
+X_dimensions = np.array([(0, 100), (0, 100)])
+Obstacles = np.array([(20, 20, 40, 40), (20, 60, 40, 80), (60, 20, 80, 40), (60, 60, 80, 80)])
+Q = np.array([(8, 4)])
+n_jobs = 16
+processes = 4
+
+if __name__ == "__main__":
+    grid_file = os.path.join(tempfile.mkdtemp(), "grid.npy")
+    X = SearchSpace(X_dimensions, Obstacles, backend="grid", resolution=0.5, grid_file=grid_file)
+    X_exact = SearchSpace(X_dimensions, Obstacles)
+
+    jobs = [(X.sample_free(), X.sample_free(), dict(planner="rrt", Q=Q, max_samples=4096, r=0.5, prc=0.1))
+            for _ in range(n_jobs)]
+    results = plan_batch(X, jobs, processes=processes, seed=0)
+
+    found = 0
+    for path, _ in results:
+        if path is None:
+            continue
+        found += 1
+        for start, end in zip(path[:-1], path[1:]):
+            if not X_exact.collision_free(start, end, 0.1):
+                raise Exception("Path edge {} -> {} crosses an obstacle".format(start, end))
+    # 워커들이 파일을 읽기만 했는지 확인한다.
+    if X.obstacle_free((30, 30)):
+        raise Exception("Grid file was cleared while the workers were planning")
+    print("{} of {} paths found, all collision free".format(found, n_jobs))
@@ -0,0 +1,159 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import math
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from src.rrt.cancellation import CancellationToken
+from src.rrt.rrt import RRT
+from src.rrt.rrt_connect import RRTConnect
+from src.rrt.rrt_star import RRTStar
+from src.rrt.rrt_star_bid import RRTStarBidirectional
+from src.rrt.rrt_star_bid_h import RRTStarBidirectionalHeuristic
+from src.rrt.rrt_star_lazy import LazyRRTStar
+from src.utilities.geometry import dist_between_points, pairwise
+
+# 같은 맵에서 여러 질의를 프로세스 여러 개로 나눠서 한꺼번에 푼다.
+# SearchSpace는 프로세스마다 한 번만 보내서 다시 만들고, 질의마다 seed를 따로 줘서 결과가 재현된다.
+# plan_portfolio는 반대로 한 질의를 seed만 바꿔서 여러 프로세스에서 동시에 풀어서 운 나쁜 seed의 긴 실행 시간을 피한다.
+# 플래너들에게 deadline과 함께 프로세스끼리 공유하는 취소 신호를 줘서, 멈출 때도 지금까지 찾은 경로를 돌려받는다.
+
+PLANNERS = {
+    "rrt": RRT,
+    "rrt_connect": RRTConnect,
+    "rrt_star": RRTStar,
+    "rrt_star_bid": RRTStarBidirectional,
+    "rrt_star_bid_h": RRTStarBidirectionalHeuristic,
+    "rrt_star_lazy": LazyRRTStar,
+}
+
+PORTFOLIO_GRACE = 1.0  # seconds plan_portfolio waits past the deadline or a cancel for planners to return
+
+_X = None  # search space of the worker process
+_cancel = None  # CancellationToken shared by the planners of a portfolio
+
+
+def _init_worker(X, cancel_event=None):
+    global _X, _cancel
+    _X = X
+    _cancel = None if cancel_event is None else CancellationToken(cancel_event)
+
+
+def _run_job(job):
+    x_init, x_goal, config = job
+    if _cancel is not None:
+        config = dict(config, cancel=_cancel)
+    return make_planner(_X, x_init, x_goal, config).plan()
+
+
+def make_planner(X, x_init, x_goal, config):
+    """
+    :param X: Search Space
+    :param x_init: tuple, initial location
+    :param x_goal: tuple, goal location
+    :param config: dict of planner constructor arguments, plus "planner", a key of PLANNERS or a planner class
+    :return: planner
+    """
+    config = dict(config)
+    planner = config.pop("planner", "rrt")
+    if isinstance(planner, str):
+        if planner not in PLANNERS:
+            raise Exception("Planner must be one of {}".format(", ".join(PLANNERS)))
+        planner = PLANNERS[planner]
+    return planner(X, x_init=x_init, x_goal=x_goal, **config)
+
+
+def plan_batch(X, jobs, processes=None, seed=None, chunksize=1):
+    """
+    Solve many queries in the same search space across a pool of processes
+    Each job without a "seed" in its config gets its own seed spawned from seed,
+    so results do not depend on how jobs are spread over processes
+    :param X: Search Space, sent once to each process
+    :param jobs: list of (x_init, x_goal, config), see make_planner for config
+    :param processes: number of processes, the number of CPUs if None
+    :param seed: seed the per job seeds are spawned from
+    :param chunksize: number of jobs sent to a process at once
+    :return: list of (path, PlannerStats) in the order of jobs, as returned by plan
+    """
+    seeds = np.random.SeedSequence(seed).spawn(len(jobs))
+    jobs = [(x_init, x_goal, dict({"seed": int(s.generate_state(1)[0])}, **config))
+            for (x_init, x_goal, config), s in zip(jobs, seeds)]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes <= 1 or len(jobs) <= 1:
+        return [make_planner(X, x_init, x_goal, config).plan() for x_init, x_goal, config in jobs]
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(X,)) as executor:
+        return list(executor.map(_run_job, jobs, chunksize=chunksize))
+
+
+def plan_portfolio(X, x_init, x_goal, config, n=None, policy="first", deadline=None, seed=None):
+    """
+    Solve one query with n differently seeded planners running in parallel processes
+    Every planner gets the deadline and a cancellation token shared across the processes, so planners
+    that are stopped return their best path so far rather than being killed
+    :param X: Search Space, sent once to each process
+    :param x_init: tuple, initial location
+    :param x_goal: tuple, goal location
+    :param config: dict of planner constructor arguments, see make_planner, any "seed" or "cancel" is replaced
+    :param n: number of planners, the number of CPUs if None
+    :param policy: "first" to return the first path found and cancel the other planners,
+    "best" to wait for every planner to finish or reach the deadline and return the shortest path
+    :param deadline: seconds each planner may search for, no limit if None, a planner still running
+    PORTFOLIO_GRACE seconds after that is terminated
+    :param seed: seed the per planner seeds are spawned from
+    :return: (path, PlannerStats) of the chosen planner as returned by plan, (None, None) if no path was found
+    """
+    if policy not in ("first", "best"):
+        raise Exception("Policy must be either 'first' or 'best'")
+    if n is None:
+        n = os.cpu_count() or 1
+    config = dict(config)
+    config.pop("cancel", None)
+    if deadline is not None:
+        config["deadline"] = deadline if config.get("deadline") is None else min(deadline, config["deadline"])
+    seeds = np.random.SeedSequence(seed).spawn(n)
+    results = queue.Queue()
+    end = None if deadline is None else time.monotonic() + deadline + PORTFOLIO_GRACE
+    best, best_cost = (None, None), math.inf
+    received = 0
+    cancel_event = multiprocessing.Event()
+    pool = multiprocessing.Pool(n, initializer=_init_worker, initargs=(X, cancel_event))
+    try:
+        for s in seeds:
+            job = (x_init, x_goal, dict(config, seed=int(s.generate_state(1)[0])))
+            pool.apply_async(_run_job, (job,), callback=results.put, error_callback=results.put)
+        pool.close()
+        while received < n:
+            try:
+                result = results.get(timeout=None if end is None else max(end - time.monotonic(), 0))
+            except queue.Empty:
+                break  # planners did not return in time
+            received += 1
+            if isinstance(result, BaseException):
+                raise result
+            path = result[0]
+            if path is None:
+                continue
+            cost = sum(dist_between_points(a, b) for a, b in pairwise(path))
+            if cost < best_cost:
+                best, best_cost = result, cost
+            if policy == "first":
+                break
+    finally:
+        # 남은 플래너들은 취소해서 스스로 끝나게 하고, 그래도 끝나지 않는 프로세스만 강제로 끝낸다.
+        cancel_event.set()
+        stop = time.monotonic() + PORTFOLIO_GRACE
+        while received < n:
+            try:
+                results.get(timeout=max(stop - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            received += 1
+        pool.terminate()
+    return best
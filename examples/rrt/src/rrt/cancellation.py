@@ -0,0 +1,27 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import threading
+
+
+class CancellationToken(object):
+    def __init__(self, event=None):
+        """
+        Flag a running search polls to find out that it should stop and return its best path so far
+        :param event: threading.Event (the default) or multiprocessing.Event to cancel a search running
+        in another thread or process
+        """
+        self.event = threading.Event() if event is None else event
+
+    def cancel(self):
+        """
+        Ask every search holding this token to stop
+        """
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        """
+        :return: True once cancel has been called
+        """
+        return self.event.is_set()
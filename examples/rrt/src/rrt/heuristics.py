@@ -18,12 +18,16 @@ def cost_to_go(a: tuple, b: tuple) -> float:
 def path_cost(E, a, b):
     """
     Cost of the unique path from x_init to x
+    Looked up from the costs cached on the vertices when E is the edge view of a Tree,
+    otherwise computed by walking parent pointers
     :param E: edges, in form of E[child] = parent
-    :param a: initial location
+    :param a: initial location, an ancestor of b
     :param b: goal location
     :return: segment_cost of unique path from x_init to x
     """
-    
+    if hasattr(E, "cost"):
+        return E.cost(b) - E.cost(a)
+
     cost = 0
     while not b == a:
         p = E[b]
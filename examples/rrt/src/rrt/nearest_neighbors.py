@@ -0,0 +1,237 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import numpy as np
+from rtree import index
+
+# 트리의 정점에서 가장 가까운 정점을 찾는 자료구조들
+# 모두 rtree의 Index와 같은 이름의 함수(insert, delete, nearest, count)와 반경 검색(within)을 가지고 있어서
+# Tree.V로 바꿔 끼울 수 있다.
+# 이미 정점이 있는 트리에 만들면 (저장된 트리를 불러올 때) 정점들을 하나씩 넣지 않고 한꺼번에 넣는다.
+
+
+class RTreeNeighbors(index.Index):
+    def __init__(self, tree):
+        """
+        libspatialindex r-tree of vertex indices
+        Vertices already in the tree are bulk loaded
+        :param tree: Tree whose vertices are indexed
+        """
+        p = index.Property()
+        p.dimension = tree.dimensions
+        ids = tree.vertex_indices()
+        if len(ids) == 0:
+            super().__init__(interleaved=True, properties=p)
+        else:
+            stream = ((i, tuple(c) + tuple(c), None) for i, c in zip(ids.tolist(), tree.coords[ids].tolist()))
+            super().__init__(stream, interleaved=True, properties=p)
+        self.tree = tree
+
+    def within(self, coordinates, radius):
+        """
+        Box query around the location, then filtered by distance
+        :param coordinates: location
+        :param radius: max distance
+        :return: list of indices of the vertices within radius of the location
+        """
+        box = tuple(c - radius for c in coordinates) + tuple(c + radius for c in coordinates)
+        ids = np.fromiter(self.intersection(box), dtype=np.intp)
+        return within_radius(self.tree, ids, coordinates, radius)
+
+
+class BruteForceNeighbors(object):
+    def __init__(self, tree):
+        """
+        Scan of every vertex in the tree's coordinate buffer with NumPy
+        Nothing to maintain on insert or delete, fastest for small trees
+        :param tree: Tree whose vertices are indexed
+        """
+        self.tree = tree
+
+    def insert(self, id, coordinates):
+        pass
+
+    def delete(self, id, coordinates):
+        pass
+
+    def nearest(self, coordinates, num_results=1):
+        """
+        :param coordinates: location
+        :param num_results: max number of vertices to return
+        :return: list of vertex indices, nearest first
+        """
+        ids = self.tree.vertex_indices()
+        if len(ids) == 0:
+            return []
+        d = ((self.tree.coords[ids] - np.asarray(coordinates, dtype=float)) ** 2).sum(axis=1)
+        return nearest_first(ids, d, num_results)
+
+    def within(self, coordinates, radius):
+        """
+        :param coordinates: location
+        :param radius: max distance
+        :return: list of indices of the vertices within radius of the location
+        """
+        return within_radius(self.tree, self.tree.vertex_indices(), coordinates, radius)
+
+    def count(self, coordinates):
+        """
+        :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :return: number of vertices at the point or inside the box
+        """
+        return count_vertices(self.tree, coordinates)
+
+
+class KDTreeNeighbors(object):
+    rebuild_min = 256  # buffered insertions always allowed before a rebuild
+    rebuild_fraction = 0.1  # otherwise rebuild once the buffer reaches this fraction of the kd-tree
+
+    def __init__(self, tree):
+        """
+        Static kd-tree (scipy's cKDTree) plus a buffer of vertices inserted since it was built
+        The buffer is scanned by brute force and the kd-tree is rebuilt once the buffer outgrows
+        a fraction of it, which keeps both insertions and queries cheap on average
+        Vertices already in the tree go straight into the kd-tree
+        :param tree: Tree whose vertices are indexed
+        """
+        try:
+            from scipy.spatial import cKDTree
+        except ImportError:
+            raise Exception("The kdtree nearest neighbour backend requires scipy")
+        self.cKDTree = cKDTree
+        self.tree = tree
+        self.kdtree = None
+        self.ids = np.zeros(0, dtype=np.intp)  # vertex index of each point in the kd-tree
+        self.buffer = {}  # vertex indices inserted since the last rebuild
+        self.stale = set()  # vertex indices whose kd-tree entry was deleted
+        if tree.V_count > 0:
+            self.rebuild()
+
+    def insert(self, id, coordinates):
+        self.buffer[id] = None
+        if len(self.buffer) > max(self.rebuild_min, self.rebuild_fraction * len(self.ids)):
+            self.rebuild()
+
+    def delete(self, id, coordinates):
+        if self.buffer.pop(id, False) is False:
+            self.stale.add(id)
+            if len(self.stale) > max(self.rebuild_min, self.rebuild_fraction * len(self.ids)):
+                self.rebuild()
+
+    def rebuild(self):
+        """
+        Build the kd-tree again from every vertex in the tree and empty the buffer
+        """
+        self.ids = self.tree.vertex_indices()
+        self.kdtree = self.cKDTree(self.tree.coords[self.ids]) if len(self.ids) else None
+        self.buffer = {}
+        self.stale = set()
+
+    def nearest(self, coordinates, num_results=1):
+        """
+        :param coordinates: location
+        :param num_results: max number of vertices to return
+        :return: list of vertex indices, nearest first
+        """
+        if num_results <= 0:
+            return []
+        x = np.asarray(coordinates, dtype=float)
+        ids, d = [], []
+        if self.kdtree is not None:
+            k = min(num_results + len(self.stale), len(self.ids))
+            distances, rows = self.kdtree.query(x, k=[i + 1 for i in range(k)])
+            for distance, row in zip(distances.tolist(), rows.tolist()):
+                i = int(self.ids[row])
+                if i not in self.stale:
+                    ids.append(i)
+                    d.append(distance ** 2)
+        if self.buffer:
+            buffered = np.fromiter(self.buffer, dtype=np.intp, count=len(self.buffer))
+            ids.extend(buffered.tolist())
+            d.extend(((self.tree.coords[buffered] - x) ** 2).sum(axis=1).tolist())
+        if not ids:
+            return []
+        return nearest_first(np.array(ids, dtype=np.intp), np.array(d), num_results)
+
+    def within(self, coordinates, radius):
+        """
+        :param coordinates: location
+        :param radius: max distance
+        :return: list of indices of the vertices within radius of the location
+        """
+        ids = []
+        if self.kdtree is not None:
+            rows = self.kdtree.query_ball_point(np.asarray(coordinates, dtype=float), radius)
+            ids = [i for i in self.ids[rows].tolist() if i not in self.stale]
+        if self.buffer:
+            buffered = np.fromiter(self.buffer, dtype=np.intp, count=len(self.buffer))
+            ids.extend(within_radius(self.tree, buffered, coordinates, radius))
+        return ids
+
+    def count(self, coordinates):
+        """
+        :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :return: number of vertices at the point or inside the box
+        """
+        return count_vertices(self.tree, coordinates)
+
+
+NEAREST_NEIGHBORS = {
+    "rtree": RTreeNeighbors,
+    "brute": BruteForceNeighbors,
+    "kdtree": KDTreeNeighbors,
+}
+
+
+def make_nearest_neighbors(name, tree):
+    """
+    :param name: one of the keys of NEAREST_NEIGHBORS
+    :param tree: Tree whose vertices are indexed
+    :return: nearest neighbour structure of that name
+    """
+    if name not in NEAREST_NEIGHBORS:
+        raise Exception("Nearest neighbour backend must be one of {}".format(", ".join(NEAREST_NEIGHBORS)))
+    return NEAREST_NEIGHBORS[name](tree)
+
+
+def nearest_first(ids, d, n):
+    """
+    :param ids: array of vertex indices
+    :param d: array of their (squared) distances
+    :param n: max number of vertices to return
+    :return: list of up to n vertex indices, nearest first
+    """
+    if n <= 0:
+        return []
+    if n < len(ids):
+        part = np.argpartition(d, n - 1)[:n]
+        ids, d = ids[part], d[part]
+    return ids[np.argsort(d, kind="stable")].tolist()
+
+
+def within_radius(tree, ids, coordinates, radius):
+    """
+    :param tree: Tree
+    :param ids: array of candidate vertex indices
+    :param coordinates: location
+    :param radius: max distance
+    :return: list of the candidates within radius of the location
+    """
+    if len(ids) == 0:
+        return []
+    d = ((tree.coords[ids] - np.asarray(coordinates, dtype=float)) ** 2).sum(axis=1)
+    return ids[d <= radius ** 2].tolist()
+
+
+def count_vertices(tree, coordinates):
+    """
+    :param tree: Tree
+    :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+    :return: number of vertices at the point or inside the box
+    """
+    if len(coordinates) == tree.dimensions:
+        return int(tree.find(coordinates) >= 0)
+    ids = tree.vertex_indices()
+    p = tree.coords[ids]
+    lo, hi = np.asarray(coordinates[:tree.dimensions]), np.asarray(coordinates[tree.dimensions:])
+    return int(np.count_nonzero(np.all((p >= lo) & (p <= hi), axis=1)))
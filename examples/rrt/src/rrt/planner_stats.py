@@ -0,0 +1,117 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import time
+from functools import wraps
+
+# 플래너가 어디에 시간을 쓰는지 단계별로 기록한다. RRTBase(stats=True)일 때만 만들어진다.
+PHASES = ("sampling", "nearest", "steering", "collision", "rewiring", "goal_check")
+
+
+class PlannerStats(object):
+    def __init__(self):
+        """
+        Time and call counts per planning phase, plus solution quality over time
+        Times are inclusive: rewiring includes the collision checks it makes, and so on
+        """
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.seconds = dict.fromkeys(PHASES, 0.0)
+        self.started = None
+        self.elapsed = 0.0  # seconds spent in the search
+        self.samples = 0  # samples taken by the search
+        self.acceptance_rate = None  # fraction of uniform candidates the planner drew that were in X_free
+        self.first_solution = None  # seconds from start to the first solution
+        self.cost_history = []  # (seconds from start, cost) every time the best cost went down
+
+    def start(self):
+        """
+        Start the clock of a search
+        """
+        self.started = time.perf_counter()
+
+    def stop(self, samples, acceptance_rate=None):
+        """
+        Stop the clock of a search
+        :param samples: number of samples the planner has taken
+        :param acceptance_rate: acceptance rate of the planner's sampler, see RRTBase.acceptance_rate
+        """
+        self.elapsed = time.perf_counter() - self.started
+        self.samples = samples
+        self.acceptance_rate = acceptance_rate
+
+    def now(self):
+        """
+        :return: seconds since the search started
+        """
+        return time.perf_counter() - self.started if self.started is not None else 0.0
+
+    @property
+    def samples_per_second(self):
+        """
+        :return: samples taken per second of search, None before a search has finished
+        """
+        if self.elapsed <= 0:
+            return None
+        return self.samples / self.elapsed
+
+    @property
+    def best_cost(self):
+        """
+        :return: lowest solution cost seen, inf if there is no solution
+        """
+        return self.cost_history[-1][1] if self.cost_history else float('inf')
+
+    def solution(self, cost):
+        """
+        Record a solution, ignored unless it is better than the best so far
+        :param cost: cost of the solution
+        """
+        if cost < self.best_cost:
+            t = self.now()
+            if self.first_solution is None:
+                self.first_solution = t
+            self.cost_history.append((t, cost))
+
+    def timed(self, phase, f):
+        """
+        :param phase: one of PHASES
+        :param f: function to time
+        :return: f, counting calls and time under phase
+        """
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            t = time.perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                self.seconds[phase] += time.perf_counter() - t
+                self.calls[phase] += 1
+
+        return wrapper
+
+    def __repr__(self):
+        lines = ["{:<10} {:>8} calls {:>9.4f} s".format(p, self.calls[p], self.seconds[p]) for p in PHASES]
+        lines.append("{} samples in {:.4f} s, {} samples/s".format(
+            self.samples, self.elapsed,
+            None if self.samples_per_second is None else round(self.samples_per_second, 1)))
+        lines.append("acceptance rate {}".format(
+            None if self.acceptance_rate is None else round(self.acceptance_rate, 3)))
+        lines.append("first solution after {} s, best cost {}".format(self.first_solution, self.best_cost))
+        return "\n".join(lines)
+
+
+class TimedSearchSpace(object):
+    def __init__(self, X, stats):
+        """
+        Search space whose collision checks are timed, everything else is passed through to X
+        :param X: Search Space
+        :param stats: PlannerStats to record into
+        """
+        self.X = X
+        self.collision_free = stats.timed("collision", X.collision_free)
+        self.collision_free_many = stats.timed("collision", X.collision_free_many)
+        self.obstacle_free = stats.timed("collision", X.obstacle_free)
+        self.free_prefix = stats.timed("collision", X.free_prefix)
+
+    def __getattr__(self, name):
+        return getattr(self.X, name)
@@ -0,0 +1,214 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import heapq
+import math
+
+import numpy as np
+
+from src.rrt.nearest_neighbors import make_nearest_neighbors
+from src.search_space.free_space_sampler import FreeSpaceSampler
+
+# 같은 맵에서 출발점과 도착점만 바뀌는 질의를 많이 받을 때 쓴다. (PRM)
+# 자유 공간의 샘플들을 가까운 것끼리 이어서 그래프(roadmap)를 한 번 만들어두고,
+# 질의마다 출발점과 도착점을 가까운 노드에 잇고 A*로 그래프를 탐색한다.
+
+START = -1  # virtual node of the start of a query
+GOAL = -2  # virtual node of the goal of a query
+
+
+class Roadmap(object):
+    def __init__(self, X, n, k=None, k_prm=None, nn="rtree", capacity=1024, seed=None):
+        """
+        Roadmap of X_free for answering many start-goal queries in the same search space
+        Nodes are samples of X_free, each joined to its nearest nodes by collision free edges
+        Offers the vertex buffers of a Tree, so the nearest neighbour structures of trees index it too
+        :param X: Search Space, its obstacles should not change while the roadmap is in use
+        :param n: number of samples to build the roadmap from
+        :param k: number of nearest nodes to join each node to, the PRM* schedule k_prm log n if None
+        :param k_prm: constant of the PRM* schedule, e(1 + 1/d) if None
+        :param nn: nearest neighbour structure of the nodes, "rtree", "brute" or "kdtree"
+        :param capacity: number of nodes to allocate room for up front
+        :param seed: seed of the roadmap's own random number generator, used for sampling
+        """
+        self.X = X
+        self.dimensions = X.dimensions
+        self.k = k
+        self.k_prm = math.e * (1 + 1 / X.dimensions) if k_prm is None else k_prm
+        self.size = 0  # number of nodes
+        self.coords = np.empty((max(int(capacity), 1), self.dimensions))
+        self.edges = []  # edges of each node in form edges[i] = [(j, cost), ...]
+        self.component = []  # union-find parent of each node, nodes with the same root are connected
+        self.version = X.obs.version  # obstacle version the edges were checked against
+        self.sampler = FreeSpaceSampler(X, X.sampler.block_size, np.random.default_rng(seed))
+        self.V = make_nearest_neighbors(nn, self)
+        self.add_samples(n)
+
+    @property
+    def V_count(self):
+        return self.size
+
+    def vertex(self, i):
+        """
+        :param i: int, node index
+        :return: tuple, node coordinates
+        """
+        return tuple(self.coords[i].tolist())
+
+    def vertex_indices(self):
+        """
+        :return: array of the indices of all nodes
+        """
+        return np.arange(self.size)
+
+    def find(self, v):
+        """
+        :param v: tuple, location
+        :return: int, index of a node at v, -1 if there is none
+        """
+        for i in self.V.nearest(tuple(v), num_results=1):
+            if self.vertex(i) == tuple(v):
+                return i
+        return -1
+
+    def current_k(self):
+        """
+        :return: number of nearest nodes to join a node to
+        """
+        if self.k is not None:
+            return self.k
+        return max(1, int(math.ceil(self.k_prm * math.log(max(self.size, 2)))))
+
+    def add_samples(self, n):
+        """
+        Add samples of X_free to the roadmap and join each to its nearest nodes
+        Can be called again to make the roadmap denser when queries fail
+        :param n: number of samples to add
+        """
+        self.check_version()
+        for _ in range(n):
+            self.add_node(self.sampler.sample())
+
+    def add_node(self, x):
+        """
+        Add a node and its collision free edges to its nearest nodes
+        :param x: tuple, location of the node
+        :return: int, index of the node
+        """
+        neighbors = self.connect(x)
+        if self.size == len(self.coords):
+            coords = np.empty((2 * len(self.coords), self.dimensions))
+            coords[:self.size] = self.coords
+            self.coords = coords
+        i = self.size
+        self.size += 1
+        self.coords[i] = x
+        self.edges.append([])
+        self.component.append(i)
+        for j, cost in neighbors:
+            self.edges[i].append((j, cost))
+            self.edges[j].append((i, cost))
+            self.union(i, j)
+        self.V.insert(i, tuple(x) + tuple(x))
+        return i
+
+    def connect(self, x):
+        """
+        Nearest nodes that can be reached from a location in a straight line
+        :param x: tuple, location
+        :return: list of (node index, edge cost)
+        """
+        neighbors = list(self.V.nearest(tuple(x), num_results=self.current_k()))
+        if not neighbors:
+            return []
+        ends = self.coords[neighbors]
+        free = self.X.collision_free_many(np.tile(np.asarray(x, dtype=float), (len(neighbors), 1)), ends)
+        costs = np.linalg.norm(ends - np.asarray(x, dtype=float), axis=1)
+        return [(j, c) for j, c, f in zip(neighbors, costs.tolist(), free.tolist()) if f]
+
+    def root(self, i):
+        """
+        :param i: int, node index
+        :return: int, representative node of the connected component of i
+        """
+        while self.component[i] != i:
+            self.component[i] = self.component[self.component[i]]
+            i = self.component[i]
+        return i
+
+    def union(self, i, j):
+        """
+        Record that nodes i and j are connected
+        :param i: int, node index
+        :param j: int, node index
+        """
+        a, b = self.root(i), self.root(j)
+        if a != b:
+            self.component[max(a, b)] = min(a, b)
+
+    def check_version(self):
+        if self.version != self.X.obs.version:
+            raise Exception("Obstacles changed since the roadmap was built")
+
+    def query(self, x_start, x_goal):
+        """
+        Shortest path through the roadmap from x_start to x_goal
+        Start and goal are joined to their nearest nodes, then the roadmap is searched with A*
+        :param x_start: tuple, start location
+        :param x_goal: tuple, goal location
+        :return: list of locations from x_start to x_goal, None if the roadmap does not connect them
+        """
+        self.check_version()
+        x_start, x_goal = tuple(x_start), tuple(x_goal)
+        if self.X.collision_free(x_start, x_goal):
+            return [x_start, x_goal]
+        starts = self.connect(x_start)
+        goals = dict(self.connect(x_goal))
+        # 출발점과 도착점이 서로 다른 덩어리에 이어져 있으면 탐색할 필요가 없다.
+        roots = {self.root(j) for j in goals}
+        starts = [(j, c) for j, c in starts if self.root(j) in roots]
+        if not starts:
+            return None
+        goal = np.asarray(x_goal, dtype=float)
+
+        def h(i):
+            return math.dist(self.coords[i], goal)
+
+        g = {}
+        came_from = {}
+        heap = []
+        for j, c in starts:
+            if c < g.get(j, math.inf):
+                g[j] = c
+                came_from[j] = START
+                heapq.heappush(heap, (c + h(j), c, j))
+        closed = set()
+        while heap:
+            _, cost, i = heapq.heappop(heap)
+            if i == GOAL:
+                break
+            if i in closed:
+                continue
+            closed.add(i)
+            if i in goals:
+                c = cost + goals[i]
+                if c < g.get(GOAL, math.inf):
+                    g[GOAL] = c
+                    came_from[GOAL] = i
+                    heapq.heappush(heap, (c, c, GOAL))
+            for j, c in self.edges[i]:
+                c += cost
+                if j not in closed and c < g.get(j, math.inf):
+                    g[j] = c
+                    came_from[j] = i
+                    heapq.heappush(heap, (c + h(j), c, j))
+        if GOAL not in came_from:
+            return None
+        path = [x_goal]
+        i = came_from[GOAL]
+        while i != START:
+            path.append(self.vertex(i))
+            i = came_from[i]
+        path.append(x_start)
+        path.reverse()
+        return path
@@ -3,18 +3,32 @@ from src.rrt.rrt_base import RRTBase
 
 # rrt_2d.py에서 RRT에 호출이 된 후에 바로 src.rrt.rrt_base.py의 RRTBase로 보내준다.
 class RRT(RRTBase):
-    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01):
+    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01, goal_bias=0.0, nn="rtree",
+                 merge_tolerance=0.0, stats=False, tree=None, seed=None,
+                 deadline=None, cancel=None, steer_to_collision=False):
         """
         Template RRT planner
         :param X: Search Space
         :param Q: list of lengths of edges added to tree
         :param x_init: tuple, initial location
         :param x_goal: tuple, goal location
-        :param max_samples: max number of samples to take
+        :param max_samples: max number of samples to draw
         :param r: resolution of points to sample along edge when checking for collisions
         :param prc: probability of checking whether there is a solution
+        :param goal_bias: probability of steering towards x_goal instead of a random sample
+        :param nn: nearest neighbour structure of the trees, "rtree", "brute" or "kdtree"
+        :param merge_tolerance: new vertices closer than this to an existing vertex of the same tree are merged
+        into it rather than inserted, 0 to only reject exact duplicates
+        :param stats: if True, time each phase of the search into a PlannerStats returned by plan
+        :param tree: optional Tree rooted at x_init to keep growing instead of starting empty, see Tree.load
+        :param seed: seed of the planner's own random number generator, used for sampling and solution checks
+        :param deadline: seconds a search may run for before it returns its best path so far, no limit if None
+        :param cancel: optional CancellationToken, a search returns its best path so far once it is cancelled
+        :param steer_to_collision: if True, a step towards a sample that an obstacle blocks is cut short just before
+        the obstacle rather than rejected
         """
-        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc)
+        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc, goal_bias, nn, merge_tolerance, stats, tree, seed,
+                         deadline, cancel, steer_to_collision)
 
     # rrt_2d.py에서 호출한다.
     def rrt_search(self):
@@ -24,10 +38,9 @@ class RRT(RRTBase):
         :return: list representation of path, dict representing edges of tree in form E[child] = parent
         """
 
-        # rrt_base.py에 있는 def add_vertex로 호출
-        self.add_vertex(0, self.x_init)
-        # rrt_base.py에 있는 def add_edge로 호출
-        self.add_edge(0, self.x_init, None)
+        self.start_search()
+        # rrt_base.py에 있는 def add_root로 호출, 출발점을 트리의 뿌리로 추가
+        self.add_root(0, self.x_init)
 
         # self.Q = rrt_2d.py에 있는 Q와 같다.
 
@@ -39,17 +52,15 @@ class RRT(RRTBase):
                     # 새로 생성한 내분점, 가장 가까운 점을 획득
                     x_new, x_nearest = self.new_and_near(0, q)
 
-                    # 오류 방지
-                    if x_new is None:
-                        continue
-
-                    # 정점들 연결(기존의 가장 가까운 점과 새로 생성한 내분점)
-                    # 여러 조건들을 만족하게끔해서 결국 선을 이어버린다.
-                    self.connect_to_point(0, x_nearest, x_new)
+                    # 오류 방지 (정점이 되지 못한 샘플이어도 시간, 취소는 확인한다.)
+                    if x_new is not None:
+                        # 정점들 연결(기존의 가장 가까운 점과 새로 생성한 내분점)
+                        # 여러 조건들을 만족하게끔해서 결국 선을 이어버린다.
+                        self.connect_to_point(0, x_nearest, x_new)
 
                     solution = self.check_solution()
                     if solution[0]:
                         # 찾은 경로를 반환해준다.
                         return solution[1]
-                    
-        
+
+    search = rrt_search
@@ -1,35 +1,133 @@
-import random
+import logging
+import time
 
 import numpy as np
 
+from src.rrt.planner_stats import PlannerStats, TimedSearchSpace
 from src.rrt.tree import Tree
-from src.utilities.geometry import steer
+from src.search_space.free_space_sampler import FreeSpaceSampler
+from src.search_space.shapes import Shape
+from src.utilities.geometry import dist_between_points, pairwise, segments_intersect_boxes, steer
+
+logger = logging.getLogger(__name__)
 
 # rrt.py에서 불리자마자 제일 처음을오 호출
 class RRTBase(object):
-    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01):
+    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01, goal_bias=0.0, nn="rtree",
+                 merge_tolerance=0.0, stats=False, tree=None, seed=None,
+                 deadline=None, cancel=None, steer_to_collision=False):
         """
         Template RRT planner
         :param X: Search Space
         :param Q: list of lengths of edges added to tree
         :param x_init: tuple, initial location
         :param x_goal: tuple, goal location
-        :param max_samples: max number of samples to take
+        :param max_samples: max number of samples to draw
         :param r: resolution of points to sample along edge when checking for collisions
         :param prc: probability of checking whether there is a solution
+        :param goal_bias: probability of steering towards x_goal instead of a random sample
+        :param nn: nearest neighbour structure of the trees, "rtree", "brute" or "kdtree"
+        :param merge_tolerance: new vertices closer than this to an existing vertex of the same tree are merged
+        into it rather than inserted, 0 to only reject exact duplicates
+        :param stats: if True, time each phase of the search into a PlannerStats returned by plan
+        :param tree: optional Tree rooted at x_init to keep growing instead of starting empty, see Tree.load
+        :param seed: seed of the planner's own random number generator, used for sampling and solution checks
+        :param deadline: seconds a search may run for before it returns its best path so far, no limit if None
+        :param cancel: optional CancellationToken, a search returns its best path so far once it is cancelled
+        :param steer_to_collision: if True, a step towards a sample that an obstacle blocks is cut short just before
+        the obstacle rather than rejected
         """
-        self.X = X
-        self.samples_taken = 0
+        self.stats = PlannerStats() if stats else None
+        # 플래너마다 자기 난수 생성기를 가져서 같은 seed면 같은 결과가 나오고, 여러 프로세스에서 따로 돌려도 된다.
+        self.rng = np.random.default_rng(seed)
+        self.sampler = FreeSpaceSampler(X, X.sampler.block_size, self.rng)
+        # 시간을 잴 때만 충돌 검사를 감싼 search space를 쓴다. 끄면 추가 비용이 전혀 없다.
+        self.X = X if self.stats is None else TimedSearchSpace(X, self.stats)
+        self.samples_taken = 0  # samples drawn, whether or not they became vertices
         self.max_samples = max_samples
+        self.deadline = deadline
+        self.cancel = cancel
+        self.steer_to_collision = steer_to_collision
+        self.stop_time = None  # perf_counter value at which the running search is out of time
         self.Q = Q
         self.r = r
         self.prc = prc
+        self.goal_bias = goal_bias
+        self.nn = nn
+        self.merge_tolerance = merge_tolerance
         self.x_init = x_init
         self.x_goal = x_goal
         self.trees = []  # list of all trees
-        # def add_tree를 호출
-        self.add_tree()  # add initial tree
+        if tree is None:
+            # def add_tree를 호출
+            self.add_tree()  # add initial tree
+        else:
+            # 저장해둔 트리를 이어서 키운다. 같은 맵에서 x_init을 뿌리로 자란 트리여야 한다.
+            if tree.X.fingerprint() != X.fingerprint():
+                raise Exception("Tree was grown in a different search space")
+            if tree.V_count > 0 and tree.E.get(x_init, False) is not None:
+                raise Exception("Tree is not rooted at x_init")
+            self.trees.append(tree)
         self.count = 0
+        if self.stats is not None:
+            self.instrument()
+
+    def instrument(self):
+        """
+        Replace the methods of each phase on this planner with versions timed into self.stats
+        """
+        for phase, name in (("sampling", "sample"), ("nearest", "nearby"), ("nearest", "within"),
+                            ("steering", "steer_towards"), ("rewiring", "rewire"),
+                            ("goal_check", "can_connect_to_goal"), ("goal_check", "connect_trees")):
+            if hasattr(self, name):
+                setattr(self, name, self.stats.timed(phase, getattr(self, name)))
+
+    @property
+    def acceptance_rate(self):
+        """
+        Fraction of the uniform candidates this planner drew that were within X_free
+        Planners sample from their own seeded sampler, so X.acceptance_rate does not count their draws
+        :return: acceptance rate, None if nothing has been drawn yet
+        """
+        return self.sampler.acceptance_rate
+
+    def start_search(self):
+        """
+        Start the clock of the deadline, called at the start of every search
+        """
+        self.stop_time = None if self.deadline is None else time.perf_counter() + self.deadline
+
+    def out_of_budget(self):
+        """
+        Cheap test made on every sample of a search
+        :return: True once max_samples are drawn, the deadline has passed or the search was cancelled
+        """
+        if self.samples_taken >= self.max_samples:
+            return True
+        if self.stop_time is not None and time.perf_counter() >= self.stop_time:
+            return True
+        return self.cancel is not None and self.cancel.cancelled
+
+    def search(self):
+        """
+        Run the planner's search algorithm
+        :return: path from x_init to x_goal, None if not found
+        """
+        raise NotImplementedError
+
+    def plan(self):
+        """
+        Run the planner's search algorithm and report on it
+        :return: path from x_init to x_goal (None if not found), PlannerStats (None unless stats were enabled)
+        """
+        if self.stats is not None:
+            self.stats.start()
+        path = self.search()
+        if self.stats is not None:
+            self.stats.stop(self.samples_taken, self.acceptance_rate)
+            if path is not None:
+                self.stats.solution(sum(dist_between_points(a, b) for a, b in pairwise(path)))
+        return path, self.stats
 
     # 함수 발동 : RRTBase의 생성자에서 호출
     # 입력 변수 : 없다.
@@ -40,7 +138,24 @@ class RRTBase(object):
         Create an empty tree and add to trees
         """
         # src.rrt.tree.py의 Tree를 호출
-        self.trees.append(Tree(self.X))
+        self.trees.append(Tree(self.X, nn=self.nn, merge_tolerance=self.merge_tolerance))
+
+    # 함수 발동 : 각 플래너의 탐색 함수 시작에서 호출
+    # 입력 변수 : 0(tree), 출발점(x)
+    # 함수 설명 : 트리가 없으면 만들고, 뿌리가 없으면 추가한다. 이미 있으면 그대로 두어서 이어서 키울 수 있다.
+    # 반환 변수 : 없다.
+    def add_root(self, tree, x):
+        """
+        Make x the root of a tree, creating the tree if needed
+        Does nothing if x is already in the tree, so a search can resume growing an existing tree
+        :param tree: int, tree to add root to
+        :param x: tuple, root vertex
+        """
+        while len(self.trees) <= tree:
+            self.add_tree()
+        if x not in self.trees[tree].E:
+            self.add_vertex(tree, x)
+            self.add_edge(tree, x, None)
 
     # 함수 발동 : rrt.py의 def rrt_search에서 호출, connect_to_point에서 호출
     # 입력 변수 : 0(tree), (0, 0)(v)
@@ -51,20 +166,15 @@ class RRTBase(object):
         :param tree: 정점을 추가할 트리
         :param v: 튜플 형태의 추가할 정점
         """
-        # 정점을 추가하는 과정인듯
-        self.trees[tree].V.insert(0, v + v, v)
-        # 트리에 정점하나 카운트 추가
-        self.trees[tree].V_count += 1
-        # 샘플 카운트도 추가
-        self.samples_taken += 1  
+        # 정점을 추가하고 트리에 정점하나 카운트 추가
+        self.trees[tree].add_vertex(v)
 
     # 함수 발동 : def connect_to_point에서 호출
     # 입력 변수 : 0(tree), 내분점(child), 가장 가까운 점(parent)
     # 반환 변수 : 없다.
     def add_edge(self, tree, child, parent):
         # child에 parent의 정보를 넣는다.(역추적할 수 있게끔)
-        print(parent)
-        self.trees[tree].E[child] = parent
+        self.trees[tree].set_parent(child, parent)
 
     # 함수 발동 : get_nearest에서 호출
     # 입력 변수 : 0(tree), x_rand(x), 1(n)
@@ -75,8 +185,8 @@ class RRTBase(object):
         :param x: 검색할 정점
         :param n: 반환할 최대 이웃수
         """
-        # .nearest는 from rtree import index(내장된 모듈)에서 있는 함수인 듯    https://rtree.readthedocs.io/en/latest/tutorial.html
-        return self.trees[tree].V.nearest(x, num_results=n, objects="raw")
+        # 트리의 V(rtree, brute, kdtree 중 하나)에서 가장 가까운 정점들을 찾는다. tree.py의 nearest 참고
+        return self.trees[tree].nearest(x, n)
 
     # 함수 발동 : new_and_near에서 호출,     can_connect_to_goal에서 호출
     # 입력 변수 : 0(tree), x_rand(x)         0(tree), self.x_goal(x)
@@ -87,8 +197,7 @@ class RRTBase(object):
         :param x: 검색할 정점
         :return: x에 가장 가까운 정점
         """
-        # next는 파이썬에 내장된 함수이다. 값을 빼내는 역할을 한다. https://homzzang.com/b/py-136
-        return next(self.nearby(tree, x, 1))
+        return self.nearby(tree, x, 1)[0]
 
     # 함수 발동rrt.py에 있는 rrt_search에서 호출
     # 입력 변수 : 0(tree), [8 4](q)
@@ -100,21 +209,53 @@ class RRTBase(object):
         :param q: length of edge when steering
         :return: vertex, new steered vertex, vertex, nearest vertex in tree to new vertex
         """
-        # search_space.py에 있는 def sample_free 호출해서 랜덤인 좌표값 얻어낸다.
-        x_rand = self.X.sample_free()
+        # def sample 호출해서 랜덤인 좌표값 얻어낸다.
+        x_rand = self.sample()
+        # 샘플을 하나씩 카운트해준다. 정점이 되지 못한 샘플도 센다. (모든 플래너에서 샘플 = sample()을 부른 횟수)
+        self.samples_taken += 1
         # def get_nearest를 호출 x_rand와 가장 가까운 정점을 받아온다.
         x_nearest = self.get_nearest(tree, x_rand)
+        # 목표 쪽으로 뽑았는데 이미 트리에 있으면 방향을 정할 수 없다.
+        if x_nearest == x_rand:
+            return None, None
         # q[0] = 8
-        # steer 파이썬 내장함수는 방향을 유지한 채로 내분점을 만들어주는 내장 함수다. (시점, 종점, 길이)
-        # bound_point로 보내서 경계 안에 있도록 만들어준다.
-        x_new = self.bound_point(steer(x_nearest, x_rand, q[0]))
-        # x_new 포인트가 V안에 혼자만 존재하는지 체크(.count)(중복되지 않는지), x_new가 장애물의 위치에 있지는 않은지
-        if not self.trees[0].V.count(x_new) == 0 or not self.X.obstacle_free(x_new):
+        x_new = self.steer_towards(x_nearest, x_rand, q[0])
+        if self.steer_to_collision:
+            # 장애물에 막히는 걸음을 버리지 않고 막히기 직전까지만 간다.
+            x_new = self.X.free_prefix(x_nearest, x_new)
+        # x_new 포인트가 키우는 트리에 이미 있거나 merge_tolerance 이내로 가까운 정점이 있는지(중복되지 않는지),
+        # x_new가 장애물의 위치에 있지는 않은지
+        if self.trees[tree].duplicate(x_new) >= 0 or not self.X.obstacle_free(x_new):
             return None, None
-        # 샘플을 하나씩 카운트해준다.
-        self.samples_taken += 1
         return x_new, x_nearest
 
+    # 함수 발동 : new_and_near에서 호출
+    # 입력 변수 : 가장 가까운 점(start), 랜덤 좌표(goal), 간선 길이(d)
+    # 반환 변수 : 방향을 유지한 내분점
+    def steer_towards(self, start, goal, d):
+        """
+        :param start: tuple, vertex to grow from
+        :param goal: tuple, location to grow towards
+        :param d: length of the step
+        :return: point d away from start in the direction of goal, clamped to the search space
+        """
+        # steer 함수는 방향을 유지한 채로 내분점을 만들어준다. (시점, 종점, 길이)
+        # bound_point로 보내서 경계 안에 있도록 만들어준다.
+        return self.bound_point(steer(start, goal, d))
+
+    # 함수 발동 : new_and_near에서 호출
+    # 입력 변수 : 없다.
+    # 함수 설명 : goal_bias의 확률로 목표를, 나머지는 플래너의 sampler로 자유 공간의 랜덤 좌표를 뽑는다.
+    # 반환 변수 : 트리를 키울 방향이 될 좌표
+    def sample(self):
+        """
+        Sample a location to grow towards
+        :return: x_goal with probability goal_bias, otherwise a random location within X_free
+        """
+        if self.goal_bias and self.rng.random() < self.goal_bias:
+            return self.x_goal
+        return self.sampler.sample()
+
     # 함수 발동 : rrt.py에 있는 rrt_search에서 호출
     # 입력 변수 : 0(tree), 가장 가까운 점(x_a), 새로 생성된 내분점(x_b)
     # 함수 설명 : 새로 생성된 내분점이 여태껏 없던 것인가 질문 and 장애물과는 충돌하지 않는지 체크
@@ -123,7 +264,7 @@ class RRTBase(object):
         """
         :return: bool, True if able to add edge, False if prohibited by an obstacle
         """
-        if self.trees[tree].V.count(x_b) == 0 and self.X.collision_free(x_a, x_b, self.r):
+        if self.trees[tree].duplicate(x_b) < 0 and self.X.collision_free(x_a, x_b, self.r):
             self.add_vertex(tree, x_b)
             self.add_edge(tree, x_b, x_a)
             return True
@@ -134,10 +275,10 @@ class RRTBase(object):
     # 함수 설명 : 목표가 그래프에 연결될 수 있는지 확인
     # 반환 변수 : 가능한 경우 true 아닌 경우 false
     def can_connect_to_goal(self, tree):
-        x_nearest = self.get_nearest(tree, self.x_goal)
-        # 트리 안에 목표가 있는 것과 트리 한 칸 위에 가장 가까운 정점이 있는지를 체크
-        if self.x_goal in self.trees[tree].E and x_nearest in self.trees[tree].E[self.x_goal]:
+        # 트리 안에 이미 목표가 있는지 체크 (goal_bias로 목표까지 자라난 경우)
+        if self.x_goal in self.trees[tree].E:
             return True
+        x_nearest = self.get_nearest(tree, self.x_goal)
         # 마지막에 직선의 형태가 나왔던 이유
         # 목표로부터 가장 가까운 점과 직선으로 이었을 때 장애물과 부딪히지 않았을 때
         # 직진
@@ -155,10 +296,10 @@ class RRTBase(object):
         :return: path if possible, None otherwise
         """
         if self.can_connect_to_goal(0):
-            print("Can connect to goal")
+            logger.info("Can connect to goal")
             self.connect_to_goal(0)
             return self.reconstruct_path(0, self.x_init, self.x_goal)
-        print("Could not connect to goal")
+        logger.info("Could not connect to goal")
         return None
 
     # get_path 마지막 조금 위에서 호출
@@ -169,8 +310,39 @@ class RRTBase(object):
         """
         Connect x_goal to graph
         """
+        if self.x_goal in self.trees[tree].E:
+            return
         x_nearest = self.get_nearest(tree, self.x_goal)
-        self.trees[tree].E[self.x_goal] = x_nearest
+        self.trees[tree].set_parent(self.x_goal, x_nearest)
+
+    # 함수 발동 : 장애물이 추가된 후에 다시 계획할 때 호출한다.
+    # 입력 변수 : 바뀐 영역(region)
+    # 함수 설명 : 영역과 겹치는 간선만 찾아서 그 아래의 서브트리와 함께 지운다.
+    # 반환 변수 : 지워진 정점들
+    def prune_region(self, region):
+        """
+        Remove tree edges that intersect a region, together with the subtrees that hang from them
+        Call after an obstacle appears so the surviving trees can keep growing instead of starting over
+        :param region: box in form (min_1, ..., min_d, max_1, ..., max_d) or a Shape, e.g. a new obstacle
+        :return: list of removed vertices
+        """
+        removed = []
+        bounds = region.bounds if isinstance(region, Shape) else region
+        for tree in self.trees:
+            edges = tree.edges_intersecting(bounds)
+            if not edges:
+                continue
+            children = np.array([c for c, _ in edges], dtype=float)
+            parents = np.array([p for _, p in edges], dtype=float)
+            if isinstance(region, Shape):
+                hit = region.intersects(children, parents)
+            else:
+                hit = segments_intersect_boxes(children, parents, [region])[:, 0]
+            for (child, _), is_hit in zip(edges, hit):
+                # child may already be gone with the subtree of an earlier edge
+                if is_hit and child in tree.E:
+                    removed.extend(tree.remove_subtree(child))
+        return removed
 
     # get_path 마지막에서 호출
     # 입력 변수 : 0(tree), 출발점(x_init), 도착점(x_goal)
@@ -204,15 +376,15 @@ class RRTBase(object):
     # 반환 변수 : 
     def check_solution(self):
         # 해결책을 찾았는지 확률적으로 확인
-        # random.random() random모듈의 random()함수를 호출하면
+        # self.rng.random()은 플래너가 가진 난수 생성기에서
         # 0이상 1미만의 숫자 중 아무 숫자를 돌려줌
-        if self.prc and random.random() < self.prc:
-            print("Checking if can connect to goal at", str(self.samples_taken), "samples")
+        if self.prc and self.rng.random() < self.prc:
+            logger.debug("Checking if can connect to goal at %d samples", self.samples_taken)
             path = self.get_path()
             if path is not None:
                 return True, path
-        # 내가 설정한 max_samples에 도달한 경우 그냥 반환해버리기
-        if self.samples_taken >= self.max_samples:
+        # max_samples에 도달했거나 시간이 다 됐거나 취소된 경우 지금까지 찾은 경로를 그냥 반환해버리기
+        if self.out_of_budget():
             return True, self.get_path()
         return False, None
 
@@ -4,7 +4,7 @@ import enum
 import numpy as np
 
 from src.rrt.rrt_base import RRTBase
-from src.utilities.geometry import steer
+from src.utilities.geometry import dist_between_points
 
 
 class Status(enum.Enum):
@@ -15,18 +15,30 @@ class Status(enum.Enum):
 
 
 class RRTConnect(RRTBase):
-    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01):
+    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01, goal_bias=0.0, nn="rtree",
+                 merge_tolerance=0.0, stats=False, tree=None, seed=None,
+                 deadline=None, cancel=None):
         """
         Template RRTConnect planner
         :param X: Search Space
         :param Q: list of lengths of edges added to tree
         :param x_init: tuple, initial location
         :param x_goal: tuple, goal location
-        :param max_samples: max number of samples to take
+        :param max_samples: max number of samples to draw
         :param r: resolution of points to sample along edge when checking for collisions
         :param prc: probability of checking whether there is a solution
+        :param goal_bias: probability of steering towards x_goal instead of a random sample
+        :param nn: nearest neighbour structure of the trees, "rtree", "brute" or "kdtree"
+        :param merge_tolerance: new vertices closer than this to an existing vertex of the same tree are merged
+        into it rather than inserted, 0 to only reject exact duplicates
+        :param stats: if True, time each phase of the search into a PlannerStats returned by plan
+        :param tree: optional Tree rooted at x_init to keep growing instead of starting empty, see Tree.load
+        :param seed: seed of the planner's own random number generator, used for sampling and solution checks
+        :param deadline: seconds a search may run for before it returns its best path so far, no limit if None
+        :param cancel: optional CancellationToken, a search returns its best path so far once it is cancelled
         """
-        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc)
+        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc, goal_bias, nn, merge_tolerance, stats, tree, seed,
+                         deadline, cancel)
         self.swapped = False
 
     def swap_trees(self):
@@ -45,32 +57,57 @@ class RRTConnect(RRTBase):
             self.swap_trees()
 
     def extend(self, tree, x_rand):
+        """
+        Grow tree one edge of length Q[0] towards x_rand, or all the way if it is closer than that
+        Q may list edge lengths, e.g. [2], or edge lengths with counts, e.g. [(2, 4)]
+        :param tree: int, tree to grow
+        :param x_rand: tuple, location to grow towards
+        :return: tuple, vertex grown to, and REACHED if it is x_rand, ADVANCED if it is short of x_rand,
+        TRAPPED if the edge was blocked
+        """
         x_nearest = self.get_nearest(tree, x_rand)
-        x_new = steer(x_nearest, x_rand, self.Q[0])
+        if x_nearest == x_rand:
+            return x_rand, Status.REACHED
+        step = np.atleast_1d(self.Q[0])[0]
+        if dist_between_points(x_nearest, x_rand) <= step:
+            x_new = x_rand
+        else:
+            x_new = self.steer_towards(x_nearest, x_rand, step)
         if self.connect_to_point(tree, x_nearest, x_new):
-            if np.abs(np.sum(np.array(x_new) - np.array(x_rand))) < 1e-2:
-                return x_new, Status.REACHED
-            return x_new, Status.ADVANCED
+            return x_new, Status.REACHED if x_new == x_rand else Status.ADVANCED
         return x_new, Status.TRAPPED
 
+    # 함수 발동 : rrt_connect에서 호출
+    # 함수 내용
+    # extend를 막힐 때까지 반복하는 대신, 장애물에 닿기 직전의 점(free_prefix)까지 간선 하나로 바로 간다.
+    # 가장 가까운 정점 찾기와 충돌 검사가 한 번씩만 일어난다.
     def connect(self, tree, x):
-        S = Status.ADVANCED
-        while S == Status.ADVANCED:
-            x_new, S = self.extend(tree, x)
-        return x_new, S
+        """
+        Grow tree in a straight line towards x as far as obstacles allow, with a single collision query
+        :param tree: int, tree to grow
+        :param x: tuple, location to grow towards
+        :return: tuple, vertex grown to, and REACHED if it is x, ADVANCED if it is short of x,
+        TRAPPED if the tree could not grow
+        """
+        x_nearest = self.get_nearest(tree, x)
+        if x_nearest == x:
+            return x, Status.REACHED
+        x_new = self.X.free_prefix(x_nearest, x)
+        if x_new != x_nearest and self.connect_to_point(tree, x_nearest, x_new):
+            return x_new, Status.REACHED if x_new == x else Status.ADVANCED
+        return x_new, Status.TRAPPED
 
     def rrt_connect(self):
         """
         RRTConnect
         :return: set of Vertices; Edges in form: vertex: [neighbor_1, neighbor_2, ...]
         """
-        self.add_vertex(0, self.x_init)
-        self.add_edge(0, self.x_init, None)
-        self.add_tree()
-        self.add_vertex(1, self.x_goal)
-        self.add_edge(1, self.x_goal, None)
-        while self.samples_taken < self.max_samples:
-            x_rand = self.X.sample_free()
+        self.start_search()
+        self.add_root(0, self.x_init)
+        self.add_root(1, self.x_goal)
+        while not self.out_of_budget():
+            x_rand = self.sample()
+            self.samples_taken += 1
             x_new, status = self.extend(0, x_rand)
             if status != Status.TRAPPED:
                 x_new, connect_status = self.connect(1, x_new)
@@ -81,4 +118,8 @@ class RRTConnect(RRTBase):
                     second_part.reverse()
                     return first_part + second_part
             self.swap_trees()
-            self.samples_taken += 1
+        # 두 트리가 아직 만나지 못했으면 지금까지 찾은 경로가 없다.
+        self.unswap()
+        return None
+
+    search = rrt_connect
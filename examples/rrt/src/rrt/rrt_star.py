@@ -1,29 +1,167 @@
 # rrt_2d.py에서는 호출하지 않는다.
 # This file is subject to the terms and conditions defined in
 # file 'LICENSE', which is part of this source code package.
+import math
+import time
 from operator import itemgetter
 
+import numpy as np
+
 from src.rrt.heuristics import cost_to_go
 from src.rrt.heuristics import segment_cost, path_cost
 from src.rrt.rrt import RRT
+from src.search_space.informed_sampler import InformedSampler
 
 
 class RRTStar(RRT):
-    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01, rewire_count=None):
+    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01, rewire_count=None, goal_bias=0.0,
+                 informed=False, nn="rtree", neighborhood="k", gamma=None, k_rrt=None,
+                 merge_tolerance=0.0, stats=False, tree=None, seed=None,
+                 deadline=None, cancel=None, prune_interval=256, steer_to_collision=False):
         """
         RRT* Search
         :param X: Search Space
         :param Q: list of lengths of edges added to tree
         :param x_init: tuple, initial location
         :param x_goal: tuple, goal location
-        :param max_samples: max number of samples to take
+        :param max_samples: max number of samples to draw
         :param r: resolution of points to sample along edge when checking for collisions
         :param prc: probability of checking whether there is a solution
         :param rewire_count: number of nearby vertices to rewire
+        :param goal_bias: probability of steering towards x_goal instead of a random sample
+        :param informed: if True, once a solution exists only sample where a shorter one could be
+        :param nn: nearest neighbour structure of the trees, "rtree", "brute" or "kdtree"
+        :param neighborhood: vertices considered for connecting and rewiring a new vertex,
+        "k" for the rewire_count nearest, "radius" for those within gamma (log n / n)^(1/d),
+        "k_log" for the k_rrt log n nearest, where n is the number of vertices in the tree
+        :param gamma: constant of the "radius" schedule, smallest asymptotically optimal value for the
+        search space volume if None
+        :param k_rrt: constant of the "k_log" schedule, 2e if None
+        :param merge_tolerance: new vertices closer than this to an existing vertex of the same tree are merged
+        into it rather than inserted, 0 to only reject exact duplicates
+        :param stats: if True, time each phase of the search into a PlannerStats returned by plan
+        :param tree: optional Tree rooted at x_init to keep growing instead of starting empty, see Tree.load
+        :param seed: seed of the planner's own random number generator, used for sampling and solution checks
+        :param deadline: seconds a search may run for before it returns its best path so far, no limit if None
+        :param cancel: optional CancellationToken, a search returns its best path so far once it is cancelled
+        :param prune_interval: number of samples between prunes of the vertices that cannot be on a path
+        shorter than c_best, 0 or None to never prune
+        :param steer_to_collision: if True, a step towards a sample that an obstacle blocks is cut short just before
+        the obstacle rather than rejected
         """
-        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc)
+        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc, goal_bias, nn, merge_tolerance, stats, tree, seed,
+                         deadline, cancel, steer_to_collision)
         self.rewire_count = rewire_count if rewire_count is not None else 0
-        self.c_best = float('inf')  # length of best solution thus far
+        self._c_best = float('inf')
+        self.prune_interval = prune_interval
+        self.pruned_cost = float('inf')  # c_best at the last prune
+        self.pruned_at = 0  # samples taken at the last prune
+        self.max_rejections = 64  # redraws of a uniform sample that cannot improve c_best
+        if neighborhood not in ("k", "radius", "k_log"):
+            raise Exception("Neighborhood must be one of 'k', 'radius' or 'k_log'")
+        self.neighborhood = neighborhood
+        self.gamma = gamma if gamma is not None else default_gamma(X)
+        self.k_rrt = k_rrt if k_rrt is not None else 2 * math.e
+        self.max_radius = max(q[0] for q in Q)  # never look further than the longest edge
+        self.informed = informed
+        self.informed_sampler = None
+        if informed:
+            self.informed_sampler = InformedSampler(X, x_init, x_goal, rng=self.rng, uniform=self.sampler)
+
+    @property
+    def c_best(self):
+        """
+        :return: length of best solution thus far
+        """
+        return self._c_best
+
+    @c_best.setter
+    def c_best(self, c):
+        self._c_best = c
+        if self.stats is not None:
+            self.stats.solution(c)
+
+    def sample(self):
+        """
+        Sample a location to grow towards
+        With informed sampling and a solution of cost c_best, locations are drawn from the
+        prolate hyperspheroid of points that could be on a path shorter than c_best
+        Without it, uniform samples that could not be on a path shorter than c_best are rejected and redrawn,
+        up to max_rejections times as the region shrinks to nothing when c_best nears the straight line cost
+        :return: x_goal with probability goal_bias, otherwise a random location within X_free
+        """
+        if self.goal_bias and self.rng.random() < self.goal_bias:
+            return self.x_goal
+        if self.informed_sampler is not None:
+            return self.informed_sampler.sample(self.c_best)
+        x = self.sampler.sample()
+        for _ in range(self.max_rejections):
+            if self.can_improve(x):
+                break
+            x = self.sampler.sample()
+        return x
+
+    def can_improve(self, x):
+        """
+        :param x: tuple, location
+        :return: True if a path from x_init to x_goal through x could be shorter than c_best
+        """
+        return math.dist(self.x_init, x) + math.dist(x, self.x_goal) < self.c_best
+
+    def update_best(self, tree, x_new):
+        """
+        Lower c_best if the goal can be reached in a straight line from a new vertex
+        The goal is then connected to that vertex, so the tree holds a path of cost c_best
+        :param tree: int, tree containing x_new
+        :param x_new: tuple, newly added vertex
+        """
+        E = self.trees[tree].E
+        if self.x_goal in E:
+            # rewiring may have shortened the path to the goal since c_best was set
+            c_goal = path_cost(E, self.x_init, self.x_goal)
+            if c_goal < self.c_best:
+                self.c_best = c_goal
+        c_new = path_cost(E, self.x_init, x_new) + segment_cost(x_new, self.x_goal)
+        if c_new < self.c_best and self.X.collision_free(x_new, self.x_goal, self.r):
+            self.trees[tree].set_parent(self.x_goal, x_new)
+            self.c_best = c_new
+
+    # 함수 발동 : rrt_star, anytime에서 샘플마다 호출
+    # 함수 내용
+    # c_best가 줄어든 뒤 prune_interval개의 샘플을 뽑았으면, 시작점까지의 비용 + 목표까지의 직선 거리가 c_best보다 큰
+    # 정점들을 트리(V, E)에서 지운다. 그런 정점을 지나는 경로는 c_best보다 짧아질 수 없어서 이웃 탐색만 느리게 한다.
+    def prune_if_due(self, tree):
+        """
+        Prune tree if c_best dropped since the last prune and prune_interval samples have been taken since
+        :param tree: int, tree to prune
+        """
+        if not self.prune_interval or not self.c_best < self.pruned_cost or \
+                self.samples_taken - self.pruned_at < self.prune_interval:
+            return
+        self.prune(tree)
+        self.pruned_cost = self.c_best
+        self.pruned_at = self.samples_taken
+
+    def prune(self, tree):
+        """
+        Remove every vertex whose cost-to-come plus straight line cost-to-go exceeds c_best
+        The descendants of such a vertex exceed it as well, so whole subtrees are removed
+        The path to the goal costs c_best and is never pruned
+        :param tree: int, tree to prune
+        :return: list of removed vertices
+        """
+        t = self.trees[tree]
+        ids = t.vertex_indices()
+        ids = ids[t.parent[ids] >= 0]
+        f = t.cost[ids] + np.linalg.norm(t.coords[ids] - np.asarray(self.x_goal, dtype=float), axis=1)
+        # 실수 오차로 목표까지의 경로 위 정점이 지워지지 않게 여유를 둔다.
+        pruned = ids[f > self.c_best * (1 + 1e-9)]
+        doomed = set(pruned.tolist())
+        removed = []
+        for i in pruned.tolist():
+            if int(t.parent[i]) not in doomed:
+                removed.extend(t.remove_subtree(t.vertex(i)))
+        return removed
 
     def get_nearby_vertices(self, tree, x_init, x_new):
         """
@@ -35,7 +173,12 @@ class RRTStar(RRT):
         :param x_new: vertex around which to find nearby vertices
         :return: list of nearby vertices and their costs, sorted in ascending order by cost
         """
-        X_near = self.nearby(tree, x_new, self.current_rewire_count(tree))
+        if self.neighborhood == "radius":
+            X_near = self.within(tree, x_new, self.current_radius(tree))
+            if not X_near:
+                X_near = self.nearby(tree, x_new, 1)
+        else:
+            X_near = self.nearby(tree, x_new, self.current_rewire_count(tree))
         L_near = [(path_cost(self.trees[tree].E, x_init, x_near) + segment_cost(x_near, x_new), x_near) for
                   x_near in X_near]
         # noinspection PyTypeChecker
@@ -43,6 +186,15 @@ class RRTStar(RRT):
 
         return L_near
 
+    def within(self, tree, x, radius):
+        """
+        :param tree: int, tree being searched
+        :param x: tuple, location
+        :param radius: max distance
+        :return: list of vertices of tree within radius of x
+        """
+        return self.trees[tree].within(x, radius)
+
     def rewire(self, tree, x_new, L_near):
         """
         Rewire tree to shorten edges if possible
@@ -52,11 +204,22 @@ class RRTStar(RRT):
         :param L_near: list of nearby vertices used to rewire
         :return:
         """
+        tent_cost_new = path_cost(self.trees[tree].E, self.x_init, x_new)
+        candidates = []
         for c_near, x_near in L_near:
             curr_cost = path_cost(self.trees[tree].E, self.x_init, x_near)
-            tent_cost = path_cost(self.trees[tree].E, self.x_init, x_new) + segment_cost(x_new, x_near)
-            if tent_cost < curr_cost and self.X.collision_free(x_near, x_new, self.r):
-                self.trees[tree].E[x_near] = x_new
+            tent_cost = tent_cost_new + segment_cost(x_new, x_near)
+            if tent_cost < curr_cost:
+                candidates.append((tent_cost, x_near))
+        if not candidates:
+            return
+
+        # collision check all improving edges at once
+        free = self.X.collision_free_many([x_near for _, x_near in candidates], [x_new] * len(candidates))
+        for (tent_cost, x_near), is_free in zip(candidates, free):
+            # earlier rewires may already have shortened the path to x_near
+            if is_free and tent_cost < path_cost(self.trees[tree].E, self.x_init, x_near):
+                self.trees[tree].set_parent(x_near, x_new)
 
     def connect_shortest_valid(self, tree, x_new, L_near):
         """
@@ -65,9 +228,15 @@ class RRTStar(RRT):
         :param x_new: tuple, vertex being added
         :param L_near: list of nearby vertices
         """
+        if self.trees[tree].duplicate(x_new) >= 0:
+            return
         # check nearby vertices for total cost and connect shortest valid edge
-        for c_near, x_near in L_near:
-            if c_near + cost_to_go(x_near, self.x_goal) < self.c_best and self.connect_to_point(tree, x_near, x_new):
+        candidates = [x_near for c_near, x_near in L_near if c_near + cost_to_go(x_near, self.x_goal) < self.c_best]
+        free = self.X.collision_free_many(candidates, [x_new] * len(candidates))
+        for x_near, is_free in zip(candidates, free):
+            if is_free:
+                self.add_vertex(tree, x_new)
+                self.add_edge(tree, x_new, x_near)
                 break
 
     def current_rewire_count(self, tree):
@@ -76,6 +245,10 @@ class RRTStar(RRT):
         :param tree: tree being rewired
         :return: rewire count
         """
+        if self.neighborhood == "k_log":
+            n = self.trees[tree].V_count
+            return min(n, max(int(math.ceil(self.k_rrt * math.log(n))), 1)) if n > 1 else n
+
         # if no rewire count specified, set rewire count to be all vertices
         if self.rewire_count is None:
             return self.trees[tree].V_count
@@ -83,32 +256,117 @@ class RRTStar(RRT):
         # max valid rewire count
         return min(self.trees[tree].V_count, self.rewire_count)
 
+    def current_radius(self, tree):
+        """
+        Radius of the shrinking ball, r(n) = gamma (log n / n)^(1/d)
+        :param tree: tree being rewired
+        :return: radius within which to connect and rewire
+        """
+        n = max(self.trees[tree].V_count, 2)
+        return min(self.gamma * (math.log(n) / n) ** (1 / self.X.dimensions), self.max_radius)
+
     def rrt_star(self):
         """
         Based on algorithm found in: Incremental Sampling-based Algorithms for Optimal Motion Planning
         http://roboticsproceedings.org/rss06/p34.pdf
         :return: set of Vertices; Edges in form: vertex: [neighbor_1, neighbor_2, ...]
         """
-        self.add_vertex(0, self.x_init)
-        self.add_edge(0, self.x_init, None)
+        self.start_search()
+        self.add_root(0, self.x_init)
 
         while True:
             for q in self.Q:  # iterate over different edge lengths
                 for i in range(q[1]):  # iterate over number of edges of given length to add
-                    x_new, x_nearest = self.new_and_near(0, q)
-                    if x_new is None:
-                        continue
-
-                    # get nearby vertices and cost-to-come
-                    L_near = self.get_nearby_vertices(0, self.x_init, x_new)
-
-                    # check nearby vertices for total cost and connect shortest valid edge
-                    self.connect_shortest_valid(0, x_new, L_near)
-
-                    if x_new in self.trees[0].E:
-                        # rewire tree
-                        self.rewire(0, x_new, L_near)
+                    x_new = self.grow(q)
+                    if x_new is not None:
+                        self.update_best(0, x_new)
+                    self.prune_if_due(0)
 
                     solution = self.check_solution()
                     if solution[0]:
                         return solution[1]
+
+    search = rrt_star
+
+    def grow(self, q):
+        """
+        Sample, connect the new vertex through its cheapest nearby vertex and rewire around it
+        :param q: length of edge and number of edges of that length to add
+        :return: tuple, new vertex of tree 0, None if no vertex was added
+        """
+        x_new, x_nearest = self.new_and_near(0, q)
+        if x_new is None:
+            return None
+
+        # get nearby vertices and cost-to-come
+        L_near = self.get_nearby_vertices(0, self.x_init, x_new)
+
+        # check nearby vertices for total cost and connect shortest valid edge
+        self.connect_shortest_valid(0, x_new, L_near)
+
+        if x_new not in self.trees[0].E:
+            return None
+        # rewire tree
+        self.rewire(0, x_new, L_near)
+        return x_new
+
+    # 함수 발동 : 첫 경로를 받은 뒤에도 더 좋은 경로를 계속 받고 싶을 때 호출한다.
+    # 입력 변수 : 제한 시간(deadline), 수렴 판정 기준(tolerance, window)
+    # 함수 내용
+    # check_solution에서 멈추지 않고 계속 샘플링, rewire하면서 c_best가 줄어들 때마다 경로를 내보낸다.
+    # 반환 변수 : (경로, 비용, 경과 시간)을 차례로 내보내는 generator
+    def anytime(self, deadline=None, tolerance=0.01, window=1000):
+        """
+        Anytime RRT*: keep sampling and rewiring after the first solution and yield every better one
+        Stops at max_samples, at either deadline, when cancelled, or once the best cost has not improved
+        by more than tolerance over window samples
+        :param deadline: seconds to search for, no limit if None, the planner's own deadline applies as well
+        :param tolerance: relative improvement of the best cost below which the search has converged
+        :param window: number of samples over which the improvement is measured
+        :return: generator of (path, cost, seconds since the search started), each strictly better than the last
+        """
+        if self.stats is not None:
+            self.stats.start()
+        start = time.perf_counter()
+        self.start_search()
+        self.add_root(0, self.x_init)
+        best = float('inf')
+        reference, improved_at = float('inf'), self.samples_taken  # cost and sample count improvement is measured from
+        try:
+            while True:
+                for q in self.Q:  # iterate over different edge lengths
+                    for i in range(q[1]):  # iterate over number of edges of given length to add
+                        x_new = self.grow(q)
+                        if x_new is not None:
+                            self.update_best(0, x_new)
+                        self.prune_if_due(0)
+                        if self.c_best < best:
+                            best = float(self.c_best)
+                            path = self.reconstruct_path(0, self.x_init, self.x_goal)
+                            yield path, best, time.perf_counter() - start
+                        if self.c_best < reference * (1 - tolerance):
+                            reference, improved_at = self.c_best, self.samples_taken
+                        if self.out_of_budget():
+                            return
+                        if deadline is not None and time.perf_counter() - start >= deadline:
+                            return
+                        if best < float('inf') and self.samples_taken - improved_at >= window:
+                            return
+        finally:
+            if self.stats is not None:
+                self.stats.stop(self.samples_taken, self.acceptance_rate)
+
+
+def default_gamma(X):
+    """
+    Smallest gamma for which the "radius" schedule is asymptotically optimal,
+    gamma > (2 (1 + 1/d))^(1/d) (volume / unit ball volume)^(1/d), using the volume of the whole
+    search space as an upper bound on the volume of X_free
+    See Karaman and Frazzoli, Sampling-based Algorithms for Optimal Motion Planning, Theorem 38
+    :param X: Search Space
+    :return: gamma
+    """
+    d = X.dimensions
+    volume = float(np.prod(X.dimension_lengths[:, 1] - X.dimension_lengths[:, 0]))
+    unit_ball_volume = math.pi ** (d / 2) / math.gamma(d / 2 + 1)
+    return (2 * (1 + 1 / d)) ** (1 / d) * (volume / unit_ball_volume) ** (1 / d)
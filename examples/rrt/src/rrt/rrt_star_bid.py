@@ -2,26 +2,49 @@
 # This file is subject to the terms and conditions defined in
 # file 'LICENSE', which is part of this source code package.
 
-import random
+import logging
 
 from src.rrt.heuristics import path_cost
 from src.rrt.rrt_star import RRTStar
 
+logger = logging.getLogger(__name__)
+
 
 class RRTStarBidirectional(RRTStar):
-    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01, rewire_count=None):
+    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01, rewire_count=None, goal_bias=0.0,
+                 informed=False, nn="rtree", neighborhood="k", gamma=None, k_rrt=None,
+                 merge_tolerance=0.0, stats=False, tree=None, seed=None,
+                 deadline=None, cancel=None, steer_to_collision=False):
         """
         Bidirectional RRT* Search
         :param X: Search Space
         :param Q: list of lengths of edges added to tree
         :param x_init: tuple, initial location
         :param x_goal: tuple, goal location
-        :param max_samples: max number of samples to take
+        :param max_samples: max number of samples to draw
         :param r: resolution of points to sample along edge when checking for collisions
         :param prc: probability of checking whether there is a solution
         :param rewire_count: number of nearby vertices to rewire
+        :param goal_bias: probability of steering towards the root of the other tree instead of a random sample
+        :param informed: if True, once a solution exists only sample where a shorter one could be
+        :param nn: nearest neighbour structure of the trees, "rtree", "brute" or "kdtree"
+        :param neighborhood: vertices considered for connecting and rewiring a new vertex, "k", "radius" or
+        "k_log", see RRTStar
+        :param gamma: constant of the "radius" schedule
+        :param k_rrt: constant of the "k_log" schedule
+        :param merge_tolerance: new vertices closer than this to an existing vertex of the same tree are merged
+        into it rather than inserted, 0 to only reject exact duplicates
+        :param stats: if True, time each phase of the search into a PlannerStats returned by plan
+        :param tree: optional Tree rooted at x_init to keep growing instead of starting empty, see Tree.load
+        :param seed: seed of the planner's own random number generator, used for sampling and solution checks
+        :param deadline: seconds a search may run for before it returns its best path so far, no limit if None
+        :param cancel: optional CancellationToken, a search returns its best path so far once it is cancelled
+        :param steer_to_collision: if True, a step towards a sample that an obstacle blocks is cut short just before
+        the obstacle rather than rejected
         """
-        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc, rewire_count)
+        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc, rewire_count, goal_bias, informed, nn,
+                         neighborhood, gamma, k_rrt, merge_tolerance, stats, tree, seed,
+                         deadline, cancel, steer_to_collision=steer_to_collision)
         self.sigma_best = None  # best solution thus far
         self.swapped = False
 
@@ -34,11 +57,12 @@ class RRTStarBidirectional(RRTStar):
         :param x_new: new vertex to add
         :param L_near: nearby vertices
         """
-        for c_near, x_near in L_near:
-            c_tent = c_near + path_cost(self.trees[a].E, self.x_init, x_new)
-            if c_tent < self.c_best and self.X.collision_free(x_near, x_new, self.r):
-                self.trees[b].V_count += 1
-                self.trees[b].E[x_new] = x_near
+        c_new = path_cost(self.trees[a].E, self.x_init, x_new)
+        candidates = [(c_near + c_new, x_near) for c_near, x_near in L_near if c_near + c_new < self.c_best]
+        free = self.X.collision_free_many([x_near for _, x_near in candidates], [x_new] * len(candidates))
+        for (c_tent, x_near), is_free in zip(candidates, free):
+            if is_free:
+                self.trees[b].set_parent(x_new, x_near)
                 self.c_best = c_tent
                 sigma_a = self.reconstruct_path(a, self.x_init, x_new)
                 sigma_b = self.reconstruct_path(b, self.x_goal, x_new)
@@ -48,6 +72,18 @@ class RRTStarBidirectional(RRTStar):
 
                 break
 
+    def prune_region(self, region):
+        """
+        Remove tree edges that intersect a region, forgetting the best solution if it used any of them
+        :param region: box in form (min_1, ..., min_d, max_1, ..., max_d) or a Shape, e.g. a new obstacle
+        :return: list of removed vertices
+        """
+        removed = super().prune_region(region)
+        if self.sigma_best is not None and set(removed).intersection(self.sigma_best):
+            self.sigma_best = None
+            self.c_best = float('inf')
+        return removed
+
     def swap_trees(self):
         """
         Swap trees and start/goal
@@ -74,55 +110,54 @@ class RRTStarBidirectional(RRTStar):
         Bidirectional RRT*
         :return: set of Vertices; Edges in form: vertex: [neighbor_1, neighbor_2, ...]
         """
+        self.start_search()
         # tree a
-        self.add_vertex(0, self.x_init)
-        self.add_edge(0, self.x_init, None)
+        self.add_root(0, self.x_init)
 
         # tree b
-        self.add_tree()
-        self.add_vertex(1, self.x_goal)
-        self.add_edge(1, self.x_goal, None)
+        self.add_root(1, self.x_goal)
 
         while True:
             for q in self.Q:  # iterate over different edge lengths
                 for i in range(q[1]):  # iterate over number of edges of given length to add
                     x_new, x_nearest = self.new_and_near(0, q)
-                    if x_new is None:
-                        continue
-
-                    # get nearby vertices and cost-to-come
-                    L_near = self.get_nearby_vertices(0, self.x_init, x_new)
+                    if x_new is not None:
+                        # get nearby vertices and cost-to-come
+                        L_near = self.get_nearby_vertices(0, self.x_init, x_new)
 
-                    # check nearby vertices for total cost and connect shortest valid edge
-                    self.connect_shortest_valid(0, x_new, L_near)
+                        # check nearby vertices for total cost and connect shortest valid edge
+                        self.connect_shortest_valid(0, x_new, L_near)
 
-                    if x_new in self.trees[0].E:
-                        # rewire tree
-                        self.rewire(0, x_new, L_near)
+                        if x_new in self.trees[0].E:
+                            # rewire tree
+                            self.rewire(0, x_new, L_near)
 
-                        # nearby vertices from opposite tree and cost-to-come
-                        L_near = self.get_nearby_vertices(1, self.x_goal, x_new)
+                            # nearby vertices from opposite tree and cost-to-come
+                            L_near = self.get_nearby_vertices(1, self.x_goal, x_new)
 
-                        self.connect_trees(0, 1, x_new, L_near)
+                            self.connect_trees(0, 1, x_new, L_near)
 
-                    if self.prc and random.random() < self.prc:  # probabilistically check if solution found
-                        print("Checking if can connect to goal at", str(self.samples_taken), "samples")
+                    if self.prc and self.rng.random() < self.prc:  # probabilistically check if solution found
+                        logger.debug("Checking if can connect to goal at %d samples", self.samples_taken)
                         if self.sigma_best is not None:
-                            print("Can connect to goal")
+                            logger.info("Can connect to goal")
                             self.unswap()
 
                             return self.sigma_best
 
-                    if self.samples_taken >= self.max_samples:
+                    # max_samples, 시간 초과, 취소 중 하나라도 걸리면 지금까지 찾은 가장 좋은 경로를 반환
+                    if self.out_of_budget():
                         self.unswap()
 
                         if self.sigma_best is not None:
-                            print("Can connect to goal")
+                            logger.info("Can connect to goal")
 
                             return self.sigma_best
                         else:
-                            print("Could not connect to goal")
+                            logger.info("Could not connect to goal")
 
                         return self.sigma_best
 
             self.swap_trees()
+
+    search = rrt_star_bidirectional
@@ -1,31 +1,54 @@
 # rrt_2d.py에서는 호출되지 않는다.
 # This file is subject to the terms and conditions defined in
 # file 'LICENSE', which is part of this source code package.
-import random
+import logging
 
 from src.rrt.rrt_star_bid import RRTStarBidirectional
 from src.utilities.geometry import dist_between_points, pairwise
 
+logger = logging.getLogger(__name__)
+
 
 class RRTStarBidirectionalHeuristic(RRTStarBidirectional):
     def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01,
-                 rewire_count: int = None, conditional_rewire: bool = False):
+                 rewire_count: int = None, conditional_rewire: bool = False, goal_bias: float = 0.0,
+                 informed: bool = False, nn: str = "rtree", neighborhood: str = "k", gamma: float = None,
+                 k_rrt: float = None, merge_tolerance: float = 0.0, stats: bool = False, tree=None,
+                 seed=None, deadline=None, cancel=None, steer_to_collision: bool = False):
         """
         Bidirectional RRT* Search
         :param X: Search Space
         :param Q: list of lengths of edges added to tree
         :param x_init: tuple, initial location
         :param x_goal: tuple, goal location
-        :param max_samples: max number of samples to take
+        :param max_samples: max number of samples to draw
         :param r: resolution of points to sample along edge when checking for collisions
         :param prc: probability of checking whether there is a solution
         :param rewire_count: number of nearby vertices to rewire
         :param conditional_rewire: if True, set rewire count to 1 until solution found,
         then set to specified rewire count (ensure runtime complexity guarantees)
+        :param goal_bias: probability of steering towards the root of the other tree instead of a random sample
+        :param informed: if True, once a solution exists only sample where a shorter one could be
+        :param nn: nearest neighbour structure of the trees, "rtree", "brute" or "kdtree"
+        :param neighborhood: vertices considered for connecting and rewiring a new vertex, "k", "radius" or
+        "k_log", see RRTStar
+        :param gamma: constant of the "radius" schedule
+        :param k_rrt: constant of the "k_log" schedule
+        :param merge_tolerance: new vertices closer than this to an existing vertex of the same tree are merged
+        into it rather than inserted, 0 to only reject exact duplicates
+        :param stats: if True, time each phase of the search into a PlannerStats returned by plan
+        :param tree: optional Tree rooted at x_init to keep growing instead of starting empty, see Tree.load
+        :param seed: seed of the planner's own random number generator, used for sampling and solution checks
+        :param deadline: seconds a search may run for before it returns its best path so far, no limit if None
+        :param cancel: optional CancellationToken, a search returns its best path so far once it is cancelled
+        :param steer_to_collision: if True, a step towards a sample that an obstacle blocks is cut short just before
+        the obstacle rather than rejected
         """
         
         super().__init__(X, Q, x_init, x_goal, max_samples, r, prc,
-                         1 if conditional_rewire else rewire_count)
+                         1 if conditional_rewire else rewire_count, goal_bias, informed, nn,
+                         neighborhood, gamma, k_rrt, merge_tolerance, stats, tree, seed,
+                         deadline, cancel, steer_to_collision)
         self.original_rewire_count = rewire_count
 
     def rrt_star_bid_h(self):
@@ -33,62 +56,61 @@ class RRTStarBidirectionalHeuristic(RRTStarBidirectional):
         Bidirectional RRT* using added heuristics
         :return: set of Vertices; Edges in form: vertex: [neighbor_1, neighbor_2, ...]
         """
+        self.start_search()
         # tree a
-        self.add_vertex(0, self.x_init)
-        self.add_edge(0, self.x_init, None)
+        self.add_root(0, self.x_init)
 
         # tree b
-        self.add_tree()
-        self.add_vertex(1, self.x_goal)
-        self.add_edge(1, self.x_goal, None)
+        self.add_root(1, self.x_goal)
 
         while True:
             for q in self.Q:  # iterate over different edge lengths
                 for i in range(q[1]):  # iterate over number of edges of given length to add
                     x_new, x_nearest = self.new_and_near(0, q)
-                    if x_new is None:
-                        continue
-
-                    # get nearby vertices and cost-to-come
-                    L_near = self.get_nearby_vertices(0, self.x_init, x_new)
+                    if x_new is not None:
+                        # get nearby vertices and cost-to-come
+                        L_near = self.get_nearby_vertices(0, self.x_init, x_new)
 
-                    # check nearby vertices for total cost and connect shortest valid edge
-                    self.connect_shortest_valid(0, x_new, L_near)
+                        # check nearby vertices for total cost and connect shortest valid edge
+                        self.connect_shortest_valid(0, x_new, L_near)
 
-                    if x_new in self.trees[0].E:
-                        # rewire tree
-                        self.rewire(0, x_new, L_near)
+                        if x_new in self.trees[0].E:
+                            # rewire tree
+                            self.rewire(0, x_new, L_near)
 
-                        # nearby vertices from opposite tree and cost-to-come
-                        L_near = self.get_nearby_vertices(1, self.x_goal, x_new)
+                            # nearby vertices from opposite tree and cost-to-come
+                            L_near = self.get_nearby_vertices(1, self.x_goal, x_new)
 
-                        self.connect_trees(0, 1, x_new, L_near)
-                        self.rewire_count = self.original_rewire_count
+                            self.connect_trees(0, 1, x_new, L_near)
+                            self.rewire_count = self.original_rewire_count
 
-                    self.lazy_shortening()
+                        self.lazy_shortening()
 
-                    if self.prc and random.random() < self.prc:  # probabilistically check if solution found
-                        print("Checking if can connect to goal at", str(self.samples_taken), "samples")
+                    if self.prc and self.rng.random() < self.prc:  # probabilistically check if solution found
+                        logger.debug("Checking if can connect to goal at %d samples", self.samples_taken)
                         if self.sigma_best is not None:
-                            print("Can connect to goal")
+                            logger.info("Can connect to goal")
                             self.unswap()
 
                             return self.sigma_best
 
-                    if self.samples_taken >= self.max_samples:
+                    # max_samples, 시간 초과, 취소 중 하나라도 걸리면 지금까지 찾은 가장 좋은 경로를 반환
+                    if self.out_of_budget():
                         self.unswap()
 
                         if self.sigma_best is not None:
-                            print("Can connect to goal")
+                            logger.info("Can connect to goal")
 
                             return self.sigma_best
                         else:
-                            print("Could not connect to goal")
+                            logger.info("Could not connect to goal")
 
                         return self.sigma_best
 
             self.swap_trees()
 
+    search = rrt_star_bid_h
+
     def lazy_shortening(self):
         """
         Lazily attempt to shorten current best path
@@ -96,7 +118,7 @@ class RRTStarBidirectionalHeuristic(RRTStarBidirectional):
         if self.sigma_best is not None and len(self.sigma_best) > 2:
             a, b = 0, 0
             while not abs(a - b) > 1:
-                a, b = random.sample(range(0, len(self.sigma_best)), 2)
+                a, b = self.rng.choice(len(self.sigma_best), 2, replace=False).tolist()
 
             a, b = min(a, b), max(a, b)
             v_a, v_b = tuple(self.sigma_best[a]), tuple(self.sigma_best[b])
@@ -104,21 +126,21 @@ class RRTStarBidirectionalHeuristic(RRTStarBidirectional):
             if self.X.collision_free(v_a, v_b, self.r):
                 # create new edge connecting vertices
                 if v_a in self.trees[0].E and v_b in self.reconstruct_path(0, self.x_init, v_a):
-                    self.trees[0].E[v_a] = v_b
+                    self.trees[0].set_parent(v_a, v_b)
                 elif v_a in self.trees[1].E and v_b in self.reconstruct_path(1, self.x_goal, v_a):
-                    self.trees[1].E[v_a] = v_b
+                    self.trees[1].set_parent(v_a, v_b)
                 elif v_b in self.trees[0].E and v_a in self.reconstruct_path(0, self.x_init, v_b):
-                    self.trees[0].E[v_b] = v_a
+                    self.trees[0].set_parent(v_b, v_a)
                 elif v_b in self.trees[1].E and v_a in self.reconstruct_path(1, self.x_goal, v_b):
-                    self.trees[1].E[v_b] = v_a
+                    self.trees[1].set_parent(v_b, v_a)
                 elif v_a in self.trees[0].E:
-                    self.trees[0].E[v_b] = v_a
+                    self.trees[0].set_parent(v_b, v_a)
                 else:
-                    self.trees[1].E[v_b] = v_a
+                    self.trees[1].set_parent(v_b, v_a)
 
                 # update best path
-                # remove cost of removed edges
-                self.c_best -= sum(dist_between_points(i, j) for i, j in pairwise(self.sigma_best[a:b + 1]))
-                # add cost of new edge
-                self.c_best += dist_between_points(self.sigma_best[a], self.sigma_best[b])
+                # remove cost of removed edges, add cost of new edge
+                self.c_best = self.c_best - sum(dist_between_points(i, j) for i, j in
+                                                pairwise(self.sigma_best[a:b + 1])) + \
+                              dist_between_points(self.sigma_best[a], self.sigma_best[b])
                 self.sigma_best = self.sigma_best[:a + 1] + self.sigma_best[b:]
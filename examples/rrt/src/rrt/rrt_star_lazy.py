@@ -0,0 +1,189 @@
+# rrt_2d.py에서는 호출되지 않는다.
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import logging
+
+from src.rrt.heuristics import cost_to_go, path_cost, segment_cost
+from src.rrt.rrt_star import RRTStar
+from src.utilities.geometry import pairwise
+
+logger = logging.getLogger(__name__)
+
+# 간선을 추가할 때는 충돌 검사를 하지 않고, 해답 후보 경로에 있는 간선만 검사한다.
+# 막힌 간선이 나오면 그 아래 서브트리를 지우고 다시 찾는다. 장애물이 적은 맵에서는 충돌 검사가 크게 줄어든다.
+
+
+class LazyRRTStar(RRTStar):
+    def __init__(self, X, Q, x_init, x_goal, max_samples, r, prc=0.01, rewire_count=None, goal_bias=0.0,
+                 informed=False, nn="rtree", neighborhood="k", gamma=None, k_rrt=None,
+                 merge_tolerance=0.0, stats=False, tree=None, seed=None,
+                 deadline=None, cancel=None, prune_interval=256, steer_to_collision=False):
+        """
+        RRT* Search with lazy collision checking
+        Edges are added and rewired without collision checks, only the edges of a candidate
+        solution are checked. Invalid edges are removed together with their subtrees and the search goes on
+        :param X: Search Space
+        :param Q: list of lengths of edges added to tree
+        :param x_init: tuple, initial location
+        :param x_goal: tuple, goal location
+        :param max_samples: max number of samples to draw
+        :param r: resolution of points to sample along edge when checking for collisions
+        :param prc: probability of checking whether there is a solution
+        :param rewire_count: number of nearby vertices to rewire
+        :param goal_bias: probability of steering towards x_goal instead of a random sample
+        :param informed: if True, once a solution exists only sample where a shorter one could be
+        :param nn: nearest neighbour structure of the trees, "rtree", "brute" or "kdtree"
+        :param neighborhood: vertices considered for connecting and rewiring a new vertex, "k", "radius" or
+        "k_log", see RRTStar
+        :param gamma: constant of the "radius" schedule
+        :param k_rrt: constant of the "k_log" schedule
+        :param merge_tolerance: new vertices closer than this to an existing vertex of the same tree are merged
+        into it rather than inserted, 0 to only reject exact duplicates
+        :param stats: if True, time each phase of the search into a PlannerStats returned by plan
+        :param tree: optional Tree rooted at x_init to keep growing instead of starting empty, see Tree.load
+        :param seed: seed of the planner's own random number generator, used for sampling and solution checks
+        :param deadline: seconds a search may run for before it returns its best path so far, no limit if None
+        :param cancel: optional CancellationToken, a search returns its best path so far once it is cancelled
+        :param prune_interval: number of samples between prunes of the vertices that cannot be on a path
+        shorter than c_best, 0 or None to never prune
+        :param steer_to_collision: if True, a step towards a sample that an obstacle blocks is cut short just before
+        the obstacle rather than rejected
+        """
+        super().__init__(X, Q, x_init, x_goal, max_samples, r, prc, rewire_count, goal_bias, informed, nn,
+                         neighborhood, gamma, k_rrt, merge_tolerance, stats, tree, seed, deadline, cancel,
+                         prune_interval, steer_to_collision)
+        # 충돌 검사를 마친 간선. 비용은 줄어들기만 해서 rewire된 정점이 예전 부모로 돌아가지 않으므로 최근 것만 기억한다.
+        self.checked = {}  # edges known to be collision free in form child: parent
+        self.checked_version = X.obs.version  # obstacle version the edges were checked against
+
+    def connect_shortest_valid(self, tree, x_new, L_near):
+        """
+        Connect to the nearby vertex giving the cheapest path, without checking the edge
+        :param tree: int, tree being added to
+        :param x_new: tuple, vertex being added
+        :param L_near: list of nearby vertices and their costs, sorted in ascending order by cost
+        """
+        if self.trees[tree].duplicate(x_new) >= 0:
+            return
+        for c_near, x_near in L_near:
+            if c_near + cost_to_go(x_near, self.x_goal) < self.c_best:
+                self.add_vertex(tree, x_new)
+                self.add_edge(tree, x_new, x_near)
+                return
+
+    def rewire(self, tree, x_new, L_near):
+        """
+        Rewire nearby vertices through x_new where that is shorter, without checking the new edges
+        :param tree: int, tree to rewire
+        :param x_new: tuple, newly added vertex
+        :param L_near: list of nearby vertices used to rewire
+        """
+        E = self.trees[tree].E
+        tent_cost_new = path_cost(E, self.x_init, x_new)
+        for c_near, x_near in L_near:
+            if tent_cost_new + segment_cost(x_new, x_near) < path_cost(E, self.x_init, x_near):
+                self.trees[tree].set_parent(x_near, x_new)
+
+    def validate(self, tree, path):
+        """
+        Collision check the edges of a path through a tree that have not been checked yet
+        The first invalid edge is removed together with the subtree hanging from it, which holds the rest of the path
+        :param tree: int, tree the path runs through
+        :param path: list of vertices from the root of tree
+        :return: True if the whole path is collision free
+        """
+        if self.checked_version != self.X.obs.version:
+            self.checked = {}
+            self.checked_version = self.X.obs.version
+        edges = [(a, b) for a, b in pairwise(path) if self.checked.get(b) != a]
+        if not edges:
+            return True
+        free = self.X.collision_free_many([a for a, _ in edges], [b for _, b in edges])
+        valid = True
+        for (a, b), is_free in zip(edges, free):
+            if is_free:
+                self.checked[b] = a
+            else:
+                valid = False
+                # the rest of the path hangs below this edge and goes with it
+                removed = self.trees[tree].remove_subtree(b)
+                self.forget_checked(removed)
+                logger.debug("Removed %d vertices below an invalid edge", len(removed))
+                break
+        if not valid and self.x_goal not in self.trees[tree].E:
+            # the path c_best was measured on is gone, every cost is an improvement again
+            self.c_best = float('inf')
+        return valid
+
+    def forget_checked(self, removed):
+        """
+        Drop the checked edges of vertices that are no longer in the tree
+        :param removed: list of removed vertices
+        """
+        for v in removed:
+            self.checked.pop(v, None)
+
+    def prune(self, tree):
+        """
+        Prune tree as RRTStar.prune does, also dropping the checked edges of the removed vertices
+        :param tree: int, tree to prune
+        :return: list of removed vertices
+        """
+        removed = super().prune(tree)
+        self.forget_checked(removed)
+        return removed
+
+    def update_best(self, tree, x_new):
+        """
+        Lower c_best if the goal can be reached in a straight line from a new vertex and the path
+        to that vertex survives validation, the goal is then connected to it
+        A path to the goal that rewiring has shortened is validated as well, so the goal never
+        stays on unchecked edges for long
+        :param tree: int, tree containing x_new
+        :param x_new: tuple, newly added vertex
+        """
+        E = self.trees[tree].E
+        if self.x_goal in E:
+            c_goal = path_cost(E, self.x_init, self.x_goal)
+            if c_goal < self.c_best and self.validate(tree, self.reconstruct_path(tree, self.x_init, self.x_goal)):
+                self.c_best = c_goal
+        if x_new not in E:
+            return  # removed by validating the path to the goal
+        c_new = path_cost(self.trees[tree].E, self.x_init, x_new) + segment_cost(x_new, self.x_goal)
+        if c_new < self.c_best and self.X.collision_free(x_new, self.x_goal, self.r) and \
+                self.validate(tree, self.reconstruct_path(tree, self.x_init, x_new)):
+            self.trees[tree].set_parent(self.x_goal, x_new)
+            self.checked[self.x_goal] = x_new
+            self.c_best = c_new
+
+    def get_path(self):
+        """
+        Return a validated path through the tree from start to goal
+        The goal's current path is validated first, then the vertices near the goal are tried
+        in order of total cost until one gives a collision free path
+        :return: path if possible, None otherwise
+        """
+        E = self.trees[0].E
+        if self.x_goal in E and self.validate(0, self.reconstruct_path(0, self.x_init, self.x_goal)):
+            return self.best_path()
+        for c_near, x_near in self.get_nearby_vertices(0, self.x_init, self.x_goal):
+            # validating an earlier candidate may have removed this one
+            if x_near == self.x_goal or x_near not in E:
+                continue
+            if self.X.collision_free(x_near, self.x_goal, self.r) and \
+                    self.validate(0, self.reconstruct_path(0, self.x_init, x_near)):
+                self.trees[0].set_parent(self.x_goal, x_near)
+                self.checked[self.x_goal] = x_near
+                return self.best_path()
+        logger.info("Could not connect to goal")
+        return None
+
+    def best_path(self):
+        """
+        :return: path to the goal through the tree, after lowering c_best to its cost
+        """
+        c_path = path_cost(self.trees[0].E, self.x_init, self.x_goal)
+        if c_path < self.c_best:
+            self.c_best = c_path
+        return self.reconstruct_path(0, self.x_init, self.x_goal)
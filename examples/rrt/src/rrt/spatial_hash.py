@@ -0,0 +1,56 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import math
+from itertools import product
+
+
+class SpatialHash(object):
+    def __init__(self, dimensions, cell_size):
+        """
+        Hash of vertex indices by quantized coordinates, cells have the edge length of the search radius
+        so every vertex within that radius of a location is in one of the 3^d cells around it
+        :param dimensions: number of dimensions
+        :param cell_size: edge length of a cell, the largest radius that can be searched
+        """
+        if cell_size <= 0:
+            raise Exception("Cell size must be positive")
+        self.cell_size = float(cell_size)
+        self.cells = {}  # vertex indices in form cells[cell] = [index, ...]
+        self.offsets = list(product((-1, 0, 1), repeat=dimensions))
+
+    def cell(self, x):
+        """
+        :param x: location
+        :return: tuple, cell containing x
+        """
+        return tuple(math.floor(c / self.cell_size) for c in x)
+
+    def insert(self, i, x):
+        """
+        :param i: int, vertex index
+        :param x: location of the vertex
+        """
+        self.cells.setdefault(self.cell(x), []).append(i)
+
+    def delete(self, i, x):
+        """
+        :param i: int, vertex index
+        :param x: location of the vertex
+        """
+        cell = self.cell(x)
+        ids = self.cells[cell]
+        ids.remove(i)
+        if not ids:
+            del self.cells[cell]
+
+    def candidates(self, x):
+        """
+        :param x: location
+        :return: generator of indices of the vertices that may be within cell_size of x
+        """
+        cell = self.cell(x)
+        for offset in self.offsets:
+            ids = self.cells.get(tuple(c + o for c, o in zip(cell, offset)))
+            if ids:
+                yield from ids
@@ -1,16 +1,432 @@
+import math
+
+import numpy as np
 from rtree import index
 
+from src.rrt.nearest_neighbors import make_nearest_neighbors
+from src.rrt.spatial_hash import SpatialHash
+
 # 내장된 모듈인 듯
 
+# parent[i] 값의 의미: 0 이상이면 부모 정점의 번호
+ROOT = -1  # vertex is a root, E[v] = None
+NO_EDGE = -2  # vertex has been added but has no edge yet, v not in E
+REMOVED = -3  # slot is free for reuse
+
+# slots 값의 의미: 0 이상이면 정점의 번호
+EMPTY = -1
+DELETED = -2
+
+
+def table_size(n):
+    """
+    :param n: minimum number of slots
+    :return: smallest power of two that is at least n, so slots can be masked instead of taken modulo
+    """
+    return 1 << max(int(n) - 1, 1).bit_length()
+
 
 class Tree(object):
-    def __init__(self, X):
+    def __init__(self, X, capacity=1024, nn="rtree", merge_tolerance=0.0):
         """
         Tree representation
+        Vertices live in preallocated NumPy buffers that double when full: coordinates,
+        integer parent indices and cost-to-come. Vertices are found from their coordinates
+        through an open addressing hash table of vertex indices, so no Python object is kept per vertex.
+        E is a dict-like view of the edges in form E[child] = parent
         :param X: Search Space
+        :param capacity: number of vertices to allocate room for up front
+        :param nn: name of the nearest neighbour structure over the vertices, see NEAREST_NEIGHBORS
+        :param merge_tolerance: locations closer than this to a vertex count as duplicates of it, 0 for exact
+        duplicates only
         """
-        p = index.Property()
-        p.dimension = X.dimensions
-        self.V = index.Index(interleaved=True, properties=p)  # vertices in an rtree
         self.V_count = 0
-        self.E = {}  # edges in form E[child] = parent
+        self.X = X
+        self.dimensions = X.dimensions
+        capacity = max(int(capacity), 1)
+        self.size = 0  # number of slots handed out, including removed ones
+        self.coords = np.empty((capacity, self.dimensions))
+        self.parent = np.full(capacity, NO_EDGE, dtype=np.int32)
+        self.cost = np.zeros(capacity)  # cost-to-come from the root
+        # children as linked lists: first child of a vertex, then its siblings
+        self.first_child = np.full(capacity, -1, dtype=np.int32)
+        self.next_sibling = np.full(capacity, -1, dtype=np.int32)
+        self.prev_sibling = np.full(capacity, -1, dtype=np.int32)
+        self.slots = np.full(table_size(2 * capacity), EMPTY, dtype=np.int32)
+        self.slots_used = 0  # occupied and deleted slots
+        self.free = []  # removed vertex indices, reused before new slots
+        self.E = Edges(self)  # edges in form E[child] = parent
+        self.edges = None  # rtree of edge bounding boxes keyed by child index, built on first use
+        self.V = make_nearest_neighbors(nn, self)  # vertex indices in a nearest neighbour structure
+        self.merge_tolerance = merge_tolerance
+        # vertex indices by quantized coordinates, only needed to find near duplicates
+        self.grid = SpatialHash(self.dimensions, merge_tolerance) if merge_tolerance > 0 else None
+
+    def vertex(self, i):
+        """
+        :param i: int, vertex index
+        :return: tuple, vertex coordinates
+        """
+        return tuple(self.coords[i].tolist())
+
+    def vertex_indices(self):
+        """
+        :return: array of the indices of all vertices in the tree
+        """
+        return np.flatnonzero(self.parent[:self.size] != REMOVED)
+
+    def find(self, v):
+        """
+        :param v: tuple, vertex
+        :return: int, index of v, -1 if v is not in the tree
+        """
+        return self._probe(tuple(v))[0]
+
+    def _probe(self, v):
+        mask = len(self.slots) - 1
+        h = hash(v) & mask
+        first_deleted = -1
+        while True:
+            i = int(self.slots[h])
+            if i == EMPTY:
+                return -1, (h if first_deleted < 0 else first_deleted)
+            if i == DELETED:
+                if first_deleted < 0:
+                    first_deleted = h
+            elif self.vertex(i) == v:
+                return i, h
+            h = (h + 1) & mask
+
+    def duplicate(self, x):
+        """
+        Vertex that makes x redundant, a vertex at x or within merge_tolerance of it
+        :param x: tuple, location
+        :return: int, index of such a vertex, -1 if there is none
+        """
+        if self.grid is None:
+            return self.find(x)
+        for i in self.grid.candidates(x):
+            if math.dist(self.coords[i], x) <= self.merge_tolerance:
+                return i
+        return -1
+
+    def _forget(self, v):
+        i, h = self._probe(v)
+        self.slots[h] = DELETED
+
+    def add_vertex(self, v):
+        """
+        Add a vertex to the tree, does nothing if it is already there
+        :param v: tuple, vertex to add
+        :return: int, index of the vertex
+        """
+        v = tuple(v)
+        i, h = self._probe(v)
+        if i >= 0:
+            return i
+        if self.free:
+            i = self.free.pop()
+        else:
+            if self.size == len(self.coords):
+                self._grow()
+            i = self.size
+            self.size += 1
+        self.coords[i] = v
+        self.parent[i] = NO_EDGE
+        self.cost[i] = 0.0
+        self.first_child[i] = self.next_sibling[i] = self.prev_sibling[i] = -1
+        if self.slots[h] == EMPTY:
+            self.slots_used += 1
+        self.slots[h] = i
+        if 2 * self.slots_used > len(self.slots):
+            self._rehash()
+        self.V.insert(i, v + v)
+        if self.grid is not None:
+            self.grid.insert(i, v)
+        self.V_count += 1
+        return i
+
+    def _grow(self):
+        capacity = 2 * len(self.coords)
+        for name in ("coords", "parent", "cost", "first_child", "next_sibling", "prev_sibling"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _rehash(self):
+        # keep the table at most half full, counting deleted slots
+        vertices = self.slots[self.slots >= 0]
+        self.slots = np.full(table_size(4 * len(vertices)), EMPTY, dtype=np.int32)
+        self.slots_used = 0
+        for i in vertices.tolist():
+            _, h = self._probe(self.vertex(i))
+            self.slots[h] = i
+            self.slots_used += 1
+
+    def nearest(self, x, n):
+        """
+        :param x: tuple, location
+        :param n: int, max number of vertices to return
+        :return: list of up to n vertices, nearest to x first
+        """
+        return [self.vertex(i) for i in self.V.nearest(tuple(x), num_results=n)]
+
+    def within(self, x, radius):
+        """
+        :param x: tuple, location
+        :param radius: max distance
+        :return: list of vertices within radius of x
+        """
+        return [self.vertex(i) for i in self.V.within(tuple(x), radius)]
+
+    def set_parent(self, child, parent):
+        """
+        Add or replace the edge from child to its parent, keeping children and the edge rtree in sync
+        A change in the cost-to-come of child is pushed down to everything below it
+        :param child: tuple, child vertex, added to the tree if missing
+        :param parent: tuple, parent vertex, None for the root
+        """
+        c = self.add_vertex(child)
+        old_cost = self.cost[c]
+        if self.parent[c] >= 0:
+            self._unlink(c)
+        if parent is None:
+            self.parent[c] = ROOT
+            self.cost[c] = 0.0
+            self._propagate(c, -old_cost)
+            return
+        p = self.find(parent)
+        if p < 0:
+            raise Exception("Parent {} is not in the tree".format(parent))
+        self.parent[c] = p
+        self.cost[c] = self.cost[p] + math.dist(self.coords[c], self.coords[p])
+        self._propagate(c, self.cost[c] - old_cost)
+        # push c to the front of the children of p
+        head = self.first_child[p]
+        self.next_sibling[c] = head
+        self.prev_sibling[c] = -1
+        if head >= 0:
+            self.prev_sibling[head] = c
+        self.first_child[p] = c
+        if self.edges is not None:
+            self.edges.insert(c, self._edge_bounds(c))
+
+    def _unlink(self, c):
+        p = self.parent[c]
+        if self.edges is not None:
+            self.edges.delete(c, self._edge_bounds(c))
+        prev, nxt = self.prev_sibling[c], self.next_sibling[c]
+        if prev >= 0:
+            self.next_sibling[prev] = nxt
+        else:
+            self.first_child[p] = nxt
+        if nxt >= 0:
+            self.prev_sibling[nxt] = prev
+        self.next_sibling[c] = self.prev_sibling[c] = -1
+        self.parent[c] = NO_EDGE
+
+    def _propagate(self, i, delta):
+        # everything below i reaches the root through i, so its cost changes by the same amount
+        if delta == 0:
+            return
+        stack = self.children(i)
+        while stack:
+            c = stack.pop()
+            self.cost[c] += delta
+            stack.extend(self.children(c))
+
+    def cost_to_come(self, v):
+        """
+        :param v: tuple, vertex
+        :return: cost of the path from the root to v through the tree
+        """
+        i = self.find(v)
+        if i < 0 or self.parent[i] == NO_EDGE:
+            raise KeyError(v)
+        return float(self.cost[i])
+
+    def children(self, i):
+        """
+        :param i: int, vertex index
+        :return: list of indices of the children of vertex i
+        """
+        children = []
+        c = int(self.first_child[i])
+        while c >= 0:
+            children.append(c)
+            c = int(self.next_sibling[c])
+        return children
+
+    def _edge_bounds(self, c):
+        a, b = self.coords[c], self.coords[self.parent[c]]
+        return tuple(np.minimum(a, b).tolist()) + tuple(np.maximum(a, b).tolist())
+
+    def edges_intersecting(self, region):
+        """
+        Edges whose bounding boxes overlap a region
+        :param region: box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :return: list of (child, parent) edges
+        """
+        if self.edges is None:
+            # bulk load every existing edge once, later edges are indexed as they are added
+            p = index.Property()
+            p.dimension = self.dimensions
+            self.edges = index.Index(interleaved=True, properties=p)
+            for c in np.flatnonzero(self.parent[:self.size] >= 0).tolist():
+                self.edges.insert(c, self._edge_bounds(c))
+        return [(self.vertex(c), self.vertex(self.parent[c])) for c in self.edges.intersection(tuple(region))]
+
+    def remove_subtree(self, v):
+        """
+        Remove a vertex, its edge to its parent and everything below it
+        :param v: tuple, root of subtree to remove
+        :return: list of removed vertices
+        """
+        i = self.find(v)
+        if i < 0 or self.parent[i] == NO_EDGE:
+            return []
+        if self.parent[i] >= 0:
+            self._unlink(i)
+        removed = []
+        stack = [i]
+        while stack:
+            x = stack.pop()
+            stack.extend(self.children(x))
+            if self.parent[x] >= 0 and self.edges is not None:
+                self.edges.delete(x, self._edge_bounds(x))
+            vertex = self.vertex(x)
+            removed.append(vertex)
+            self._forget(vertex)
+            self.V.delete(x, vertex + vertex)
+            if self.grid is not None:
+                self.grid.delete(x, vertex)
+            self.V_count -= 1
+            self.parent[x] = REMOVED
+            self.first_child[x] = self.next_sibling[x] = self.prev_sibling[x] = -1
+            self.free.append(x)
+        return removed
+
+    def save(self, path):
+        """
+        Write the tree to an .npz file: coordinates, parent indices and costs of the vertices,
+        plus the fingerprint of the search space it was grown in
+        Removed vertices are left out and the remaining ones renumbered, so the file is compact
+        :param path: file to write
+        """
+        ids = self.vertex_indices()
+        renumber = np.full(self.size, -1, dtype=np.int32)
+        renumber[ids] = np.arange(len(ids), dtype=np.int32)
+        parent = self.parent[ids]
+        parent = np.where(parent >= 0, renumber[np.maximum(parent, 0)], parent).astype(np.int32)
+        np.savez(path, coords=self.coords[ids], parent=parent, cost=self.cost[ids],
+                 fingerprint=np.array(self.X.fingerprint()))
+
+    @classmethod
+    def load(cls, path, X, nn="rtree", merge_tolerance=0.0):
+        """
+        Read a tree written by save, to keep growing it
+        The hash table, children lists and nearest neighbour structure are rebuilt in bulk
+        :param path: file to read
+        :param X: Search Space, must have the same bounds and obstacles as the one the tree was grown in
+        :param nn: name of the nearest neighbour structure over the vertices, see NEAREST_NEIGHBORS
+        :param merge_tolerance: see Tree
+        :return: Tree
+        """
+        with np.load(path) as data:
+            if str(data["fingerprint"]) != X.fingerprint():
+                raise Exception("Tree in {} was grown in a different search space".format(path))
+            coords, parent, cost = data["coords"], data["parent"], data["cost"]
+        if coords.shape[1:] != (X.dimensions,):
+            raise Exception("Tree in {} has incorrect dimension definition".format(path))
+        n = len(coords)
+        tree = cls(X, capacity=n, nn=nn, merge_tolerance=merge_tolerance)
+        tree.size = tree.V_count = n
+        tree.coords[:n] = coords
+        tree.parent[:n] = parent
+        tree.cost[:n] = cost
+        # children lists: sort the children by parent, each run of equal parents is one list
+        children = np.flatnonzero(parent >= 0)
+        children = children[np.argsort(parent[children], kind="stable")]
+        parents = parent[children]
+        same = parents[1:] == parents[:-1]
+        tree.next_sibling[children[:-1][same]] = children[1:][same]
+        tree.prev_sibling[children[1:][same]] = children[:-1][same]
+        heads = np.ones(len(children), dtype=bool)
+        heads[1:] = ~same
+        tree.first_child[parents[heads]] = children[heads]
+        tree.slots = np.full(table_size(4 * n), EMPTY, dtype=np.int32)
+        for i, v in enumerate(coords.tolist()):
+            v = tuple(v)
+            _, h = tree._probe(v)
+            tree.slots[h] = i
+            if tree.grid is not None:
+                tree.grid.insert(i, v)
+        tree.slots_used = n
+        tree.V = make_nearest_neighbors(nn, tree)
+        return tree
+
+    def nbytes(self):
+        """
+        :return: bytes held by the vertex buffers and hash table, the rtree is not included
+        """
+        return sum(a.nbytes for a in (self.coords, self.parent, self.cost, self.first_child,
+                                      self.next_sibling, self.prev_sibling, self.slots))
+
+
+class Edges(object):
+    def __init__(self, tree):
+        """
+        Dict-like view of the edges of a Tree in form E[child] = parent, parent None for a root
+        Assigning E[child] = parent calls Tree.set_parent
+        :param tree: Tree
+        """
+        self.tree = tree
+
+    def __getitem__(self, child):
+        i = self.tree.find(child)
+        if i < 0 or self.tree.parent[i] == NO_EDGE:
+            raise KeyError(child)
+        p = self.tree.parent[i]
+        return None if p == ROOT else self.tree.vertex(p)
+
+    def __setitem__(self, child, parent):
+        self.tree.set_parent(child, parent)
+
+    def cost(self, v):
+        """
+        :param v: tuple, vertex
+        :return: cost of the path from the root to v, see Tree.cost_to_come
+        """
+        return self.tree.cost_to_come(v)
+
+    def __contains__(self, child):
+        i = self.tree.find(child)
+        return i >= 0 and self.tree.parent[i] != NO_EDGE
+
+    def _indices(self):
+        return np.flatnonzero(self.tree.parent[:self.tree.size] >= ROOT).tolist()
+
+    def __len__(self):
+        return len(self._indices())
+
+    def __iter__(self):
+        return (self.tree.vertex(i) for i in self._indices())
+
+    def keys(self):
+        return iter(self)
+
+    def get(self, child, default=None):
+        try:
+            return self[child]
+        except KeyError:
+            return default
+
+    def items(self):
+        """
+        :return: generator of (child, parent) pairs, parent None for a root
+        """
+        tree = self.tree
+        for i in self._indices():
+            p = tree.parent[i]
+            yield tree.vertex(i), None if p == ROOT else tree.vertex(p)
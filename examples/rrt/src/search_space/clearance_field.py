@@ -0,0 +1,147 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import math
+
+import numpy as np
+
+
+def signed_distance_to_boxes(points, boxes):
+    """
+    Signed Euclidean distance from points to the nearest of a set of axis-aligned boxes
+    :param points: array of shape (n, d)
+    :param boxes: array of shape (k, 2d), one box per row
+    :return: array of shape (n,), distance to the nearest box, negative penetration depth inside a box
+    """
+    points = np.asarray(points, dtype=float)
+    if len(boxes) == 0:
+        return np.full(len(points), np.inf)
+    dimensions = points.shape[1]
+    lo = boxes[None, :, :dimensions]
+    hi = boxes[None, :, dimensions:]
+    p = points[:, None, :]
+    outside = np.linalg.norm(np.maximum(np.maximum(lo - p, p - hi), 0.0), axis=2)
+    depth = np.minimum(p - lo, hi - p).min(axis=2)
+    return np.where(depth > 0, -depth, outside).min(axis=1)
+
+
+class ClearanceField(object):
+    def __init__(self, dimension_lengths, boxes, resolution=1.0, max_distance=None, shapes=()):
+        """
+        Precomputed distance transform over a set of obstacles
+        Holds the signed distance to the nearest obstacle at the center of every grid cell,
+        capped at max_distance so each obstacle only has to update the cells around it.
+        Build it once per map and share it between search spaces and planners over that map
+        :param dimension_lengths: range of each dimension
+        :param boxes: array of shape (k, 2d), one obstacle per row
+        :param resolution: edge length of a grid cell
+        :param max_distance: largest distance stored in the field, 16 cells if None
+        :param shapes: non-box obstacles, each contributes the lower bound given by its distance method
+        """
+        if resolution <= 0:
+            raise Exception("Field resolution must be positive")
+        dimension_lengths = np.asarray(dimension_lengths, dtype=float)
+        boxes = np.asarray(boxes, dtype=float).reshape(-1, 2 * len(dimension_lengths))
+        self.resolution = float(resolution)
+        self.lower = dimension_lengths[:, 0]
+        self.shape = tuple(int(n) for n in np.maximum(np.ceil(
+            (dimension_lengths[:, 1] - dimension_lengths[:, 0]) / self.resolution), 1))
+        self.upper_index = np.array(self.shape) - 1
+
+        self.max_distance = 16 * self.resolution if max_distance is None else float(max_distance)
+
+        # per axis coordinates of the cell centers, the distance to a box separates over axes
+        axes = [self.lower[i] + (np.arange(n) + 0.5) * self.resolution for i, n in enumerate(self.shape)]
+        self.distance = np.full(self.shape, self.max_distance)
+        for box in boxes:
+            # only cells closer than max_distance to the box can change
+            window = []
+            outside = 0.0
+            depth = np.inf
+            for i, x in enumerate(axes):
+                lo, hi = box[i], box[i + len(axes)]
+                a = max(int(np.floor((lo - self.max_distance - self.lower[i]) / self.resolution)), 0)
+                b = min(int(np.ceil((hi + self.max_distance - self.lower[i]) / self.resolution)) + 1, len(x))
+                window.append(slice(a, b))
+                x = x[a:b]
+                shape = [1] * len(axes)
+                shape[i] = len(x)
+                outside = outside + (np.maximum(np.maximum(lo - x, x - hi), 0.0) ** 2).reshape(shape)
+                depth = np.minimum(depth, np.minimum(x - lo, hi - x).reshape(shape))
+            window = tuple(window)
+            np.minimum(self.distance[window], np.where(depth > 0, -depth, np.sqrt(outside)),
+                       out=self.distance[window])
+        dimensions = len(axes)
+        for shape in shapes:
+            window = []
+            for i, x in enumerate(axes):
+                lo, hi = shape.bounds[i], shape.bounds[i + dimensions]
+                a = max(int(np.floor((lo - self.max_distance - self.lower[i]) / self.resolution)), 0)
+                b = min(int(np.ceil((hi + self.max_distance - self.lower[i]) / self.resolution)) + 1, len(x))
+                window.append(slice(a, b))
+            centers = np.stack(np.meshgrid(*[x[w] for x, w in zip(axes, window)], indexing="ij"), axis=-1)
+            window = tuple(window)
+            distance = shape.distance(centers.reshape(-1, dimensions)).reshape(centers.shape[:-1])
+            np.minimum(self.distance[window], distance, out=self.distance[window])
+
+    def clearance(self, points):
+        """
+        Lower bound on the distance from each point to the nearest obstacle
+        :param points: array of shape (n, d)
+        :return: array of shape (n,), negative values mean the point may be inside an obstacle
+        """
+        points = np.asarray(points, dtype=float)
+        i = np.clip(np.floor((points - self.lower) / self.resolution).astype(np.intp), 0, self.upper_index)
+        center = self.lower + (i + 0.5) * self.resolution
+        # distance is 1-Lipschitz, so moving from the cell center to the point loses at most that far
+        return self.distance[tuple(i.T)] - np.linalg.norm(points - center, axis=1)
+
+    def trace_one(self, start, end):
+        """
+        Sphere trace a single line segment, see trace
+        Plain Python arithmetic, cheaper than the vectorized version for one segment
+        :param start: start of line segment
+        :param end: end of line segment
+        :return: fraction of the segment known to be obstacle-free, 1 if the whole segment is obstacle-free
+        """
+        v = [b - a for a, b in zip(start, end)]
+        length = math.sqrt(sum(c * c for c in v))
+        s = 0.0
+        while s <= length:
+            t = s / length if length > 0 else 0.0
+            p = [a + t * c for a, c in zip(start, v)]
+            i = tuple(min(max(int(math.floor((c - lo) / self.resolution)), 0), n - 1)
+                      for c, lo, n in zip(p, self.lower, self.shape))
+            offset = math.sqrt(sum((c - (lo + (j + 0.5) * self.resolution)) ** 2
+                                   for c, lo, j in zip(p, self.lower, i)))
+            c = self.distance[i] - offset
+            if c < self.resolution:
+                return t
+            s += c
+        return 1.0
+
+    def trace(self, starts, ends):
+        """
+        Sphere trace line segments, stepping each one forward by its local clearance
+        A segment stops when its clearance drops below one cell, where the field can no longer decide
+        :param starts: array of shape (m, d), start of each segment
+        :param ends: array of shape (m, d), end of each segment
+        :return: array of shape (m,), fraction of each segment known to be obstacle-free,
+        1 where the whole segment is obstacle-free
+        """
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        v = ends - starts
+        length = np.linalg.norm(v, axis=1)
+        u = v / np.where(length > 0, length, 1)[:, None]
+        s = np.zeros(len(starts))
+        stopped = np.ones(len(starts))
+        active = np.arange(len(starts))
+        while len(active) > 0:
+            c = self.clearance(starts[active] + s[active, None] * u[active])
+            blocked = c < self.resolution
+            stopped[active[blocked]] = s[active[blocked]] / np.where(length[active[blocked]] > 0,
+                                                                     length[active[blocked]], 1)
+            s[active] += c
+            active = active[~blocked & (s[active] <= length[active])]
+        return stopped
@@ -0,0 +1,75 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+from collections import OrderedDict
+
+
+class EdgeCache(object):
+    def __init__(self, maxsize=4096):
+        """
+        Bounded cache of line segment collision results, evicts the least recently used entry
+        :param maxsize: max number of segments to remember, 0 disables the cache
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.version = None  # obstacle version the entries were computed against
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(start, end):
+        """
+        Segments are undirected, so both endpoint orders map to the same key
+        :param start: start of line segment
+        :param end: end of line segment
+        :return: hashable key of the segment
+        """
+        start, end = tuple(start), tuple(end)
+        return (start, end) if start <= end else (end, start)
+
+    @property
+    def hit_rate(self):
+        """
+        :return: fraction of lookups answered from the cache, None if there were no lookups
+        """
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return None
+        return self.hits / lookups
+
+    def get(self, key, version):
+        """
+        Look up a segment
+        :param key: key of the segment
+        :param version: current obstacle version, entries from another version are dropped
+        :return: True if obstacle-free, False if not, None if unknown
+        """
+        if version != self.version:
+            self.clear()
+            self.version = version
+        free = self.entries.get(key)
+        if free is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return free
+
+    def put(self, key, free):
+        """
+        Remember a segment, evicting the least recently used one if full
+        :param key: key of the segment
+        :param free: True if the segment is obstacle-free
+        """
+        if self.maxsize <= 0:
+            return
+        self.entries[key] = free
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Forget all segments, hit and miss counters are kept
+        """
+        self.entries.clear()
@@ -0,0 +1,59 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import numpy as np
+
+
+class FreeSpaceSampler(object):
+    def __init__(self, X, block_size=256, rng=None):
+        """
+        Buffered rejection sampler of X_free
+        Draws blocks of candidates at once, filters them with one vectorized free-space test
+        and hands out the survivors one by one
+        :param X: Search Space
+        :param block_size: number of candidates drawn per block
+        :param rng: numpy.random.Generator to draw from, the global numpy random state if None
+        """
+        if block_size < 1:
+            raise Exception("Block size must be at least 1")
+        self.X = X
+        self.block_size = block_size
+        self.rng = np.random if rng is None else rng
+        self.buffer = []
+        self.version = None  # obstacle version the buffer was filtered against
+        self.drawn = 0  # candidates drawn so far
+        self.accepted = 0  # candidates found to be in X_free so far
+
+    @property
+    def acceptance_rate(self):
+        """
+        Fraction of candidates that were in X_free, low values mean rejection sampling is expensive
+        :return: acceptance rate, None if nothing has been drawn yet
+        """
+        if self.drawn == 0:
+            return None
+        return self.accepted / self.drawn
+
+    def sample(self):
+        """
+        Sample a location within X_free
+        :return: random location within X_free
+        """
+        if self.version != self.X.obs.version:
+            # obstacles changed since the buffer was filtered
+            self.buffer = []
+            self.version = self.X.obs.version
+        while not self.buffer:
+            self.refill()
+        return self.buffer.pop()
+
+    def refill(self):
+        """
+        Draw a block of candidates and keep those within X_free
+        """
+        candidates = self.rng.uniform(self.X.dimension_lengths[:, 0], self.X.dimension_lengths[:, 1],
+                                      (self.block_size, self.X.dimensions))
+        free = candidates[self.X.obstacle_free_many(candidates)]
+        self.drawn += len(candidates)
+        self.accepted += len(free)
+        self.buffer = [tuple(x) for x in free.tolist()]
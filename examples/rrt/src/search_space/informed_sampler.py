@@ -0,0 +1,124 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import math
+
+import numpy as np
+
+
+def rotation_to_world_frame(x_start, x_goal):
+    """
+    Rotation taking the first axis onto the line from start to goal
+    See Gammell et al., Informed RRT*, http://arxiv.org/abs/1404.2334
+    :param x_start: start location
+    :param x_goal: goal location
+    :return: array of shape (d, d)
+    """
+    a1 = np.subtract(x_goal, x_start) / math.dist(x_start, x_goal)
+    e1 = np.zeros(len(a1))
+    e1[0] = 1.0
+    U, _, Vt = np.linalg.svd(np.outer(a1, e1))
+    middle = np.ones(len(a1))
+    middle[-1] = np.linalg.det(U) * np.linalg.det(Vt)
+    return U @ np.diag(middle) @ Vt
+
+
+def sample_unit_ball(n, dimensions, rng=np.random):
+    """
+    :param n: number of samples
+    :param dimensions: number of dimensions
+    :param rng: numpy.random.Generator to draw from
+    :return: array of shape (n, d), uniformly distributed in the unit ball
+    """
+    directions = rng.normal(size=(n, dimensions))
+    directions /= np.linalg.norm(directions, axis=1)[:, None]
+    return directions * rng.uniform(size=(n, 1)) ** (1.0 / dimensions)
+
+
+class InformedSampler(object):
+    def __init__(self, X, x_start, x_goal, block_size=256, rng=None, uniform=None):
+        """
+        Sampler of the part of X_free that can hold a path shorter than the best one found
+        Every such point lies in the prolate hyperspheroid with foci x_start, x_goal
+        and transverse diameter c_best, which is sampled directly
+        :param X: Search Space
+        :param x_start: start location
+        :param x_goal: goal location
+        :param block_size: number of candidates drawn per block
+        :param rng: numpy.random.Generator to draw from, the global numpy random state if None
+        :param uniform: FreeSpaceSampler used while sampling is not informed, the one of X if None
+        """
+        if block_size < 1:
+            raise Exception("Block size must be at least 1")
+        self.X = X
+        self.x_start = np.asarray(x_start, dtype=float)
+        self.x_goal = np.asarray(x_goal, dtype=float)
+        self.block_size = block_size
+        self.rng = np.random if rng is None else rng
+        self.uniform = X.sampler if uniform is None else uniform
+        self.c_min = math.dist(x_start, x_goal)  # length of the straight line, lower bound on any path
+        self.center = (self.x_start + self.x_goal) / 2
+        self.C = rotation_to_world_frame(x_start, x_goal) if self.c_min > 0 else np.eye(X.dimensions)
+        lengths = X.dimension_lengths[:, 1] - X.dimension_lengths[:, 0]
+        self.volume = float(np.prod(lengths))  # volume of the search space
+        self.unit_ball_volume = math.pi ** (X.dimensions / 2) / math.gamma(X.dimensions / 2 + 1)
+        self.buffer = []
+        self.buffer_c_best = None
+        self.version = None  # obstacle version the buffer was filtered against
+
+    def radii(self, c_best):
+        """
+        :param c_best: cost of the best solution so far
+        :return: array of shape (d,), semi-axes of the hyperspheroid
+        """
+        r = np.full(self.X.dimensions, math.sqrt(max(c_best ** 2 - self.c_min ** 2, 0.0)) / 2)
+        r[0] = c_best / 2
+        return r
+
+    def informed_volume(self, c_best):
+        """
+        :param c_best: cost of the best solution so far
+        :return: volume of the hyperspheroid
+        """
+        return self.unit_ball_volume * float(np.prod(self.radii(c_best)))
+
+    def sample(self, c_best):
+        """
+        Sample a location within X_free that could improve on c_best
+        Falls back to uniform sampling while there is no solution or the hyperspheroid
+        is larger than the search space
+        :param c_best: cost of the best solution so far, inf if there is none
+        :return: random location within X_free
+        """
+        if math.isinf(c_best) or self.informed_volume(c_best) >= self.volume:
+            return self.uniform.sample()
+        if self.version != self.X.obs.version:
+            self.buffer = []
+            self.version = self.X.obs.version
+        if self.buffer_c_best != c_best:
+            # samples of a larger hyperspheroid that fall within the smaller one are still uniform in it
+            self.buffer = [x for x in self.buffer if self.focal_sum(x) <= c_best]
+            self.buffer_c_best = c_best
+        while not self.buffer:
+            self.refill(c_best)
+        return self.buffer.pop()
+
+    def focal_sum(self, x):
+        """
+        :param x: location
+        :return: length of the shortest path from x_start through x to x_goal
+        """
+        return math.dist(self.x_start, x) + math.dist(x, self.x_goal)
+
+    def refill(self, c_best):
+        """
+        Draw a block of candidates from the hyperspheroid and keep those within bounds and X_free
+        :param c_best: cost of the best solution so far
+        """
+        ball = sample_unit_ball(self.block_size, self.X.dimensions, self.rng)
+        candidates = (ball * self.radii(c_best)) @ self.C.T + self.center
+        inside = np.all((candidates >= self.X.dimension_lengths[:, 0]) &
+                        (candidates <= self.X.dimension_lengths[:, 1]), axis=1)
+        candidates = candidates[inside]
+        free = candidates[self.X.obstacle_free_many(candidates)]
+        self.buffer = [tuple(x) for x in free.tolist()]
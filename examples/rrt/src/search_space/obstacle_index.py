@@ -0,0 +1,210 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import numpy as np
+from rtree import index
+
+from src.search_space.shapes import Shape
+
+
+class ObstacleIndex(index.Index):
+    def __init__(self, stream=None, **kwargs):
+        """
+        r-tree of obstacles that keeps track of its contents
+        Every add or delete bumps version, so structures derived from the obstacles
+        (grids, caches, ...) can tell when they are stale.
+        Shapes are indexed by their bounding boxes and kept apart from the box obstacles
+        :param stream: optional iterable of (id, obstacle, obstacle) used to bulk load the tree
+        """
+        self.version = 0
+        self.obstacles = {}  # box obstacles in form obstacles[id] = obstacle
+        self.shapes = {}  # non-box obstacles in form shapes[id] = shape
+        self._boxes = None
+        self._rows = None
+        self._boxes_version = None
+        if stream is None:
+            super().__init__(**kwargs)
+        else:
+            super().__init__(self._record(stream), **kwargs)
+
+    def _record(self, stream):
+        for i, coordinates, obj in stream:
+            self._track(i, coordinates, obj)
+            yield i, coordinates, obj
+
+    def _track(self, i, coordinates, obj):
+        if isinstance(obj, Shape):
+            self.shapes[i] = obj
+        else:
+            self.obstacles[i] = coordinates
+
+    def insert(self, id, coordinates, obj=None):
+        self._track(id, coordinates, obj)
+        self.version += 1
+        super().insert(id, coordinates, obj)
+
+    add = insert
+
+    def delete(self, id, coordinates):
+        self.obstacles.pop(id, None)
+        self.shapes.pop(id, None)
+        self.version += 1
+        super().delete(id, coordinates)
+
+    def boxes(self):
+        """
+        All box obstacles as one array
+        :return: array of shape (n, 2d), one obstacle per row
+        """
+        if self._boxes_version != self.version:
+            self._boxes = as_boxes(self.obstacles.values(), self.properties.dimension)
+            self._rows = {i: row for row, i in enumerate(self.obstacles)}
+            self._boxes_version = self.version
+        return self._boxes
+
+    def intersecting_boxes(self, coordinates):
+        """
+        Box obstacles overlapping a point or box
+        :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :return: array of shape (n, 2d), one overlapping obstacle per row
+        """
+        boxes = self.boxes()
+        # look rows up by id rather than unpickling the objects stored in the r-tree
+        if not self.shapes:
+            return boxes[[self._rows[i] for i in self.intersection(coordinates)]]
+        return boxes[[self._rows[i] for i in self.intersection(coordinates) if i in self._rows]]
+
+    def intersecting_shapes(self, coordinates):
+        """
+        Shapes whose bounding boxes overlap a point or box
+        :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :return: list of shapes
+        """
+        if not self.shapes:
+            return []
+        return [self.shapes[i] for i in self.intersection(coordinates) if i in self.shapes]
+
+
+class ArrayObstacleIndex(object):
+    def __init__(self, dimension, stream=None):
+        """
+        Obstacles kept in one NumPy array and queried by broadcasting over all of them
+        Answers the same queries as ObstacleIndex without per-call ctypes overhead,
+        which makes it faster on maps with few obstacles
+        :param dimension: number of dimensions
+        :param stream: optional iterable of (id, obstacle, obstacle) to load
+        """
+        self.dimension = dimension
+        self.version = 0
+        self.obstacles = {}  # box obstacles in form obstacles[id] = obstacle
+        self.shapes = {}  # non-box obstacles in form shapes[id] = shape
+        self.objects = {}  # objects stored with obstacles in form objects[id] = obj
+        self._boxes = None
+        self._lo = None
+        self._hi = None
+        self._ids = None
+        self._boxes_version = None
+        if stream is not None:
+            for i, coordinates, obj in stream:
+                self._track(i, coordinates, obj)
+
+    def _track(self, i, coordinates, obj):
+        if isinstance(obj, Shape):
+            self.shapes[i] = obj
+        else:
+            self.obstacles[i] = coordinates
+        self.objects[i] = obj
+
+    def insert(self, id, coordinates, obj=None):
+        self._track(id, coordinates, obj)
+        self.version += 1
+
+    add = insert
+
+    def delete(self, id, coordinates):
+        self.obstacles.pop(id, None)
+        self.shapes.pop(id, None)
+        self.objects.pop(id, None)
+        self.version += 1
+
+    def boxes(self):
+        """
+        All box obstacles as one array
+        :return: array of shape (n, 2d), one obstacle per row
+        """
+        if self._boxes_version != self.version:
+            self._boxes = as_boxes(self.obstacles.values(), self.dimension)
+            self._lo, self._hi = self._boxes[:, :self.dimension], self._boxes[:, self.dimension:]
+            self._ids = list(self.obstacles)
+            self._boxes_version = self.version
+        return self._boxes
+
+    def _overlapping(self, coordinates):
+        self.boxes()  # refreshes the cached bounds
+        if len(coordinates) == self.dimension:
+            lo = hi = coordinates
+        else:
+            lo, hi = coordinates[:self.dimension], coordinates[self.dimension:]
+        return ((self._lo <= hi) & (self._hi >= lo)).all(axis=1)
+
+    def _overlapping_shapes(self, coordinates):
+        if len(coordinates) == self.dimension:
+            lo = hi = coordinates
+        else:
+            lo, hi = coordinates[:self.dimension], coordinates[self.dimension:]
+        d = self.dimension
+        return [i for i, shape in self.shapes.items()
+                if all(a <= h and b >= l for a, b, l, h in zip(shape.bounds[:d], shape.bounds[d:], lo, hi))]
+
+    def count(self, coordinates):
+        """
+        :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :return: number of obstacles (of shape bounding boxes) overlapping it
+        """
+        n = int(np.count_nonzero(self._overlapping(coordinates)))
+        if self.shapes:
+            n += len(self._overlapping_shapes(coordinates))
+        return n
+
+    def intersection(self, coordinates, objects=False):
+        """
+        Obstacles overlapping a point or box, same results as rtree's Index.intersection
+        :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :param objects: False for ids, "raw" for the stored objects
+        :return: generator of ids or objects
+        """
+        ids = [self._ids[i] for i in np.flatnonzero(self._overlapping(coordinates))]
+        if self.shapes:
+            ids += self._overlapping_shapes(coordinates)
+        for i in ids:
+            yield self.objects[i] if objects else i
+
+    def intersecting_boxes(self, coordinates):
+        """
+        Box obstacles overlapping a point or box
+        :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :return: array of shape (n, 2d), one overlapping obstacle per row
+        """
+        return self.boxes()[self._overlapping(coordinates)]
+
+    def intersecting_shapes(self, coordinates):
+        """
+        Shapes whose bounding boxes overlap a point or box
+        :param coordinates: point, or box in form (min_1, ..., min_d, max_1, ..., max_d)
+        :return: list of shapes
+        """
+        if not self.shapes:
+            return []
+        return [self.shapes[i] for i in self._overlapping_shapes(coordinates)]
+
+    def __len__(self):
+        return len(self.obstacles) + len(self.shapes)
+
+
+def as_boxes(obstacles, dimension):
+    """
+    :param obstacles: iterable of obstacles
+    :param dimension: number of dimensions
+    :return: array of shape (n, 2d), one obstacle per row
+    """
+    return np.array([tuple(o) for o in obstacles], dtype=float).reshape(-1, 2 * dimension)
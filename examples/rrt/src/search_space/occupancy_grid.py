@@ -0,0 +1,180 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+import os
+
+import numpy as np
+
+
+class OccupancyGrid(object):
+    def __init__(self, dimension_lengths, resolution, filename=None, key=None, readonly=False):
+        """
+        Occupancy grid (bitmap in 2D, voxels in 3D) over a search space
+        :param dimension_lengths: range of each dimension
+        :param resolution: edge length of a grid cell
+        :param filename: optional .npy file to back the grid with a memory map, for large maps
+        An existing file of the right shape is mapped as is and reused if it holds the grid of key,
+        a new file is only created if it is missing or of another shape
+        :param key: str identifying the obstacles the grid is rasterized from, see SearchSpace.grid_key
+        :param readonly: if True, map the file read-only and only if it holds the grid of key,
+        otherwise keep a private in-memory grid and leave the file alone
+        """
+        if resolution <= 0:
+            raise Exception("Grid resolution must be positive")
+        dimension_lengths = np.asarray(dimension_lengths, dtype=float)
+        self.resolution = float(resolution)
+        self.lower = dimension_lengths[:, 0]
+        self.shape = tuple(int(n) for n in np.maximum(np.ceil(
+            (dimension_lengths[:, 1] - dimension_lengths[:, 0]) / self.resolution), 1))
+        self.upper_index = np.array(self.shape) - 1
+        self.filename = filename
+        self.key = None  # key of the obstacles the cells were rasterized from, None if unknown
+        self.readonly = False
+        self.cells = None
+        if filename is not None:
+            file_key = read_grid_key(filename)
+            if not readonly or file_key == key:
+                self.cells = self.open_existing(filename, "r" if readonly else "r+")
+            if self.cells is not None:
+                self.key = file_key
+                self.readonly = readonly
+            elif not readonly:
+                # 파일이 없거나 모양이 다를 때만 새로 만든다.
+                write_grid_key(filename, None)
+                self.cells = np.lib.format.open_memmap(filename, mode="w+", dtype=bool, shape=self.shape)
+        if self.cells is None:
+            self.filename = None
+            self.cells = np.zeros(self.shape, dtype=bool)
+
+    def open_existing(self, filename, mode):
+        """
+        :param filename: .npy file
+        :param mode: "r" or "r+"
+        :return: memory map of the file, None if it does not exist or does not hold a grid of this shape
+        """
+        if not os.path.exists(filename):
+            return None
+        try:
+            cells = np.load(filename, mmap_mode=mode)
+        except ValueError:
+            return None
+        if cells.shape != self.shape or cells.dtype != bool:
+            return None
+        return cells
+
+    def rasterize(self, boxes, shapes=(), key=None):
+        """
+        Mark every cell touched by an obstacle as occupied
+        The cells are filled in a scratch array and copied in at once, so a shared file is never seen cleared
+        :param boxes: array of shape (n, 2d), one obstacle per row
+        :param shapes: non-box obstacles, a cell is marked if its center is within half a cell diagonal
+        :param key: str identifying the obstacles, stored next to the file so it can be reused
+        """
+        if self.readonly:
+            raise Exception("Grid file is mapped read-only")
+        cells = np.zeros(self.shape, dtype=bool)
+        dimensions = len(self.shape)
+        for box in np.asarray(boxes, dtype=float).reshape(-1, 2 * dimensions):
+            lo = self.cell_index(box[:dimensions])
+            hi = self.cell_index(box[dimensions:])
+            cells[tuple(slice(a, b + 1) for a, b in zip(lo, hi))] = True
+        half_diagonal = self.resolution * np.sqrt(dimensions) / 2
+        for shape in shapes:
+            lo = self.cell_index(shape.bounds[:dimensions])
+            hi = self.cell_index(shape.bounds[dimensions:])
+            window = tuple(slice(a, b + 1) for a, b in zip(lo, hi))
+            centers = np.stack(np.meshgrid(*[self.lower[i] + (np.arange(a, b + 1) + 0.5) * self.resolution
+                                             for i, (a, b) in enumerate(zip(lo, hi))], indexing="ij"), axis=-1)
+            touched = shape.distance(centers.reshape(-1, dimensions)) <= half_diagonal
+            cells[window] |= touched.reshape(centers.shape[:-1])
+        if isinstance(self.cells, np.memmap):
+            write_grid_key(self.filename, None)
+        self.cells[...] = cells
+        self.key = key
+        if isinstance(self.cells, np.memmap):
+            self.cells.flush()
+            write_grid_key(self.filename, key)
+
+    def cell_index(self, points):
+        """
+        Grid cell containing each point, points outside the grid map to the nearest border cell
+        :param points: array of shape (..., d)
+        :return: integer array of shape (..., d)
+        """
+        i = np.floor((np.asarray(points, dtype=float) - self.lower) / self.resolution).astype(np.intp)
+        return np.clip(i, 0, self.upper_index)
+
+    def occupied(self, points):
+        """
+        :param points: array of shape (..., d)
+        :return: boolean array of shape (...), True where the point lies in an occupied cell
+        """
+        i = self.cell_index(points)
+        return self.cells[tuple(np.moveaxis(i, -1, 0))]
+
+    def segments_free(self, starts, ends):
+        """
+        Check line segments by looking up points spaced half a cell apart along each of them
+        :param starts: array of shape (m, d), start of each segment
+        :param ends: array of shape (m, d), end of each segment
+        :return: boolean array of shape (m,), True where no point of the segment lies in an occupied cell
+        """
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        lengths = np.linalg.norm(ends - starts, axis=1)
+        n_points = np.ceil(lengths / (self.resolution / 2)).astype(np.intp) + 1
+        segment = np.repeat(np.arange(len(starts)), n_points)
+        # position of each point along its own segment, from 0 to 1
+        offsets = np.arange(n_points.sum()) - np.repeat(np.cumsum(n_points) - n_points, n_points)
+        t = offsets / np.maximum(np.repeat(n_points, n_points) - 1, 1)
+        points = starts[segment] + t[:, None] * (ends[segment] - starts[segment])
+        hits = np.bincount(segment, weights=self.occupied(points), minlength=len(starts))
+        return hits == 0
+
+    def free_prefix(self, start, end):
+        """
+        Look up points spaced half a cell apart along a line segment until one lies in an occupied cell
+        :param start: start of line segment
+        :param end: end of line segment
+        :return: parameter in [0, 1] of the last point before the first one in an occupied cell,
+        1 if no point of the segment is, 0 if start is
+        """
+        start = np.asarray(start, dtype=float)
+        end = np.asarray(end, dtype=float)
+        n_points = int(np.ceil(np.linalg.norm(end - start) / (self.resolution / 2))) + 1
+        t = np.linspace(0.0, 1.0, n_points)
+        occupied = self.occupied(start + t[:, None] * (end - start))
+        if not occupied.any():
+            return 1.0
+        first = int(np.argmax(occupied))
+        return float(t[first - 1]) if first > 0 else 0.0
+
+
+# 그리드 파일 옆에 어떤 장애물로 만든 그리드인지(key)를 적어둬서, 같은 맵이면 다시 그리지 않고 파일을 그대로 쓴다.
+def grid_key_file(filename):
+    return str(filename) + ".key"
+
+
+def read_grid_key(filename):
+    """
+    :param filename: .npy file of a grid
+    :return: key stored next to the file, None if there is none
+    """
+    try:
+        with open(grid_key_file(filename)) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_grid_key(filename, key):
+    """
+    :param filename: .npy file of a grid
+    :param key: key of the obstacles the file now holds, None to mark it as holding nothing reusable
+    """
+    if key is None:
+        if os.path.exists(grid_key_file(filename)):
+            os.remove(grid_key_file(filename))
+        return
+    with open(grid_key_file(filename), "w") as f:
+        f.write(key)
@@ -3,22 +3,49 @@
 # This file is subject to the terms and conditions defined in
 # file 'LICENSE', which is part of this source code package.
 
+import hashlib
+import uuid
+
 import numpy as np
 from rtree import index
 
-from src.utilities.geometry import es_points_along_line
+from src.search_space.clearance_field import ClearanceField, signed_distance_to_boxes
+from src.search_space.edge_cache import EdgeCache
+from src.search_space.free_space_sampler import FreeSpaceSampler
+from src.search_space.obstacle_index import ArrayObstacleIndex, ObstacleIndex
+from src.search_space.occupancy_grid import OccupancyGrid
+from src.search_space.shapes import Shape
+from src.utilities.geometry import segment_box_intervals, segments_intersect_boxes
 from src.utilities.obstacle_generation import obstacle_generator
 
+# 장애물이 이 개수 이하면 rtree 대신 numpy 배열로 장애물을 저장한다. (obstacle_store_benchmark.py 참고)
+ARRAY_STORE_MAX_OBSTACLES = 128
+# free_prefix가 돌려주는 점과 처음 닿는 장애물 사이에 남겨두는 거리
+FREE_PREFIX_MARGIN = 1e-6
+
+
 # 함수 발동 : rrt_2d.py에서 호출
 # 입력 변수 : 맵의 크기 dimension_lengths, 장애물 들의 위치
 # 함수 내용
 # 반환 변수 : self.obs.count(x)가 0인지 아닌지를 체크
 class SearchSpace(object):
-    def __init__(self, dimension_lengths, O=None):
+    def __init__(self, dimension_lengths, O=None, backend="rtree", resolution=1.0, grid_file=None,
+                 sample_block_size=256, clearance_field=None, edge_cache_size=4096, obstacle_store="auto"):
         """
         Initialize Search Space
         :param dimension_lengths: range of each dimension
-        :param O: list of obstacles
+        :param O: list of obstacles, boxes in form (min_1, ..., min_d, max_1, ..., max_d) or Shapes
+        :param backend: "rtree" to answer queries from the obstacle r-tree,
+        "grid" to answer them from an occupancy grid rasterized from the obstacles
+        :param resolution: edge length of a grid cell, only used by the grid backend
+        :param grid_file: optional .npy file to memory map the grid from, only used by the grid backend
+        A file already holding the grid of the same map and resolution is reused, otherwise it is rasterized again
+        :param sample_block_size: number of candidates sample_free draws and filters at once
+        :param clearance_field: optional prebuilt ClearanceField of the same obstacles,
+        used to sphere trace line segments in collision checks
+        :param edge_cache_size: number of line segment collision results to remember, 0 disables the cache
+        :param obstacle_store: "rtree" to keep obstacles in a libspatialindex r-tree, "array" to keep them in
+        a NumPy array, "auto" to use the array for up to ARRAY_STORE_MAX_OBSTACLES obstacles
         """
         # sanity check
         if len(dimension_lengths) < 2:
@@ -30,19 +57,89 @@ class SearchSpace(object):
         if any(i[0] >= i[1] for i in dimension_lengths):
             raise Exception("Dimension start must be less than dimension end")
         self.dimension_lengths = dimension_lengths  # length of each dimension
-        p = index.Property()
-        p.dimension = self.dimensions
-        if O is None:
-            self.obs = index.Index(interleaved=True, properties=p)
-        else:
-            # r-tree representation of obstacles
+        if backend not in ("rtree", "grid"):
+            raise Exception("Backend must be either 'rtree' or 'grid'")
+        self.backend = backend
+        self.resolution = resolution
+        self.grid_file = grid_file
+        self._grid = None
+        self._grid_version = None
+        self._grid_readonly = False  # set on unpickled copies, they only read the grid_file of the original
+        if obstacle_store not in ("auto", "rtree", "array"):
+            raise Exception("Obstacle store must be one of 'auto', 'rtree' or 'array'")
+        if O is not None:
+            if any(isinstance(o, Shape) and len(o.bounds) / 2 != len(dimension_lengths) for o in O):
+                raise Exception("Shape has incorrect dimension definition")
+            boxes = [o for o in O if not isinstance(o, Shape)]
             # sanity check
-            if any(len(o) / 2 != len(dimension_lengths) for o in O):
+            if any(len(o) / 2 != len(dimension_lengths) for o in boxes):
                 raise Exception("Obstacle has incorrect dimension definition")
-            if any(o[i] >= o[int(i + len(o) / 2)] for o in O for i in range(int(len(o) / 2))):
+            if any(o[i] >= o[int(i + len(o) / 2)] for o in boxes for i in range(int(len(o) / 2))):
                 raise Exception("Obstacle start must be less than obstacle end")
-            # src.utilities.obstacle_generation.py에 있는 obstacle_generator를 호출한다.
-            self.obs = index.Index(obstacle_generator(O), interleaved=True, properties=p)
+        if obstacle_store == "auto":
+            n = 0 if O is None else len(O)
+            obstacle_store = "array" if n <= ARRAY_STORE_MAX_OBSTACLES else "rtree"
+        self.obstacle_store = obstacle_store
+        if obstacle_store == "array":
+            self.obs = ArrayObstacleIndex(self.dimensions, None if O is None else obstacle_generator(O))
+        else:
+            p = index.Property()
+            p.dimension = self.dimensions
+            if O is None or len(O) == 0:
+                self.obs = ObstacleIndex(interleaved=True, properties=p)
+            else:
+                # r-tree representation of obstacles
+                # src.utilities.obstacle_generation.py에 있는 obstacle_generator를 호출한다.
+                self.obs = ObstacleIndex(obstacle_generator(O), interleaved=True, properties=p)
+        self.sampler = FreeSpaceSampler(self, sample_block_size)
+        self.clearance_field = clearance_field
+        self.edge_cache = EdgeCache(edge_cache_size)
+        self._fingerprint = None
+        self._fingerprint_version = None
+        # 다른 프로세스로 보낼 때(pickle) 다시 만들기 위해 생성자 인자를 기억해둔다.
+        self._options = (backend, resolution, grid_file, sample_block_size, edge_cache_size)
+
+    # 함수 발동 : 맵이 바뀌어서 다시 계획할 때 호출한다.
+    # 입력 변수 : 추가할 장애물의 위치(obstacle)
+    # 함수 내용
+    # 장애물을 추가하면 obs의 version이 바뀌어서 grid, cache 등은 알아서 다시 만들어진다.
+    # 반환 변수 : 장애물의 id (remove_obstacle에 사용)
+    def add_obstacle(self, obstacle):
+        """
+        Add an obstacle to the search space
+        :param obstacle: obstacle in form (min_1, ..., min_d, max_1, ..., max_d), or a Shape
+        :return: id of the obstacle, used to remove it
+        """
+        if isinstance(obstacle, Shape):
+            if len(obstacle.bounds) != 2 * self.dimensions:
+                raise Exception("Shape has incorrect dimension definition")
+            i = uuid.uuid4().int >> 65
+            self.obs.add(i, obstacle.bounds, obstacle)
+            return i
+        obstacle = tuple(obstacle)
+        if len(obstacle) != 2 * self.dimensions:
+            raise Exception("Obstacle has incorrect dimension definition")
+        if any(obstacle[i] >= obstacle[i + self.dimensions] for i in range(self.dimensions)):
+            raise Exception("Obstacle start must be less than obstacle end")
+        i = uuid.uuid4().int >> 65
+        self.obs.add(i, obstacle, obstacle)
+        return i
+
+    def remove_obstacle(self, i):
+        """
+        Remove an obstacle from the search space
+        :param i: id of the obstacle, as returned by add_obstacle
+        :return: the removed obstacle
+        """
+        if i in self.obs.shapes:
+            shape = self.obs.shapes[i]
+            self.obs.delete(i, shape.bounds)
+            return shape
+        if i not in self.obs.obstacles:
+            raise Exception("No obstacle with id {}".format(i))
+        obstacle = tuple(self.obs.obstacles[i])
+        self.obs.delete(i, obstacle)
+        return obstacle
 
     # 여기 아래서부터는 나중에 체크할 때 계속 호출된다.
 
@@ -53,39 +150,336 @@ class SearchSpace(object):
     # 반환 변수 : self.obs.count(x)가 0인지 아닌지를 체크 장애물 안에 있지 않으면 true
     # 그렇지 않으면 false
     def obstacle_free(self, x):
+        if self.backend == "grid":
+            return not self.grid.occupied(x)
+        if self.obs.shapes:
+            # the index only knows the bounding boxes of shapes
+            return bool(self.obstacle_free_many([x])[0])
         return self.obs.count(x) == 0
 
+    # 함수 발동 : 여러 점을 한꺼번에 확인할 때 호출한다.
+    # 입력 변수 : 확인할 위치들(points)
+    # 함수 내용
+    # grid면 배열 인덱싱으로, rtree면 후보 장애물들과 한꺼번에 비교
+    # 반환 변수 : 점 별로 장애물 안에 있지 않으면 true인 배열
+    def obstacle_free_many(self, points):
+        """
+        Check many locations against obstacles in one vectorized call
+        :param points: sequence of locations
+        :return: boolean array, True where the location is not inside an obstacle
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, self.dimensions)
+        if self.backend == "grid":
+            return ~self.grid.occupied(points)
+        if len(points) == 0:
+            return np.ones(0, dtype=bool)
+        lower, upper = points.min(axis=0), points.max(axis=0)
+        candidates = self.segment_candidates(lower, upper)
+        free = np.ones(len(points), dtype=bool)
+        if len(candidates) > 0:
+            inside = (points[:, None, :] >= candidates[None, :, :self.dimensions]) & \
+                     (points[:, None, :] <= candidates[None, :, self.dimensions:])
+            free = ~inside.all(axis=2).any(axis=1)
+        for shape in self.shape_candidates(lower, upper):
+            free &= ~shape.contains(points)
+        return free
+
+    def __reduce__(self):
+        """
+        Pickle the search space as its definition: bounds, obstacles and options
+        The r-tree, grid, caches and clearance field are rebuilt by the receiving process,
+        the clearance field with the resolution and max_distance of the current one
+        A grid_file is rasterized here first and only mapped read-only by the receiving process
+        """
+        backend, resolution, grid_file, sample_block_size, edge_cache_size = self._options
+        if backend == "grid" and grid_file is not None:
+            self.grid  # rasterize into grid_file before it is shared
+        O = [tuple(o) for o in self.obs.obstacles.values()] + list(self.obs.shapes.values())
+        args = (self.dimension_lengths, O, backend, resolution, grid_file, sample_block_size, None,
+                edge_cache_size, self.obstacle_store)
+        field = self.clearance_field
+        clearance = None if field is None else (field.resolution, field.max_distance)
+        return unpickle_search_space, (args, clearance, grid_file is not None)
+
+    # 함수 발동 : 트리를 저장하거나 불러올 때 호출한다. (tree.py의 save, load)
+    # 입력 변수 : 없다.
+    # 함수 내용
+    # 맵의 크기와 장애물들을 정렬해서 해시한다. 장애물을 넣은 순서나 id는 상관없다.
+    # 반환 변수 : 해시 문자열, 같은 맵이면 같은 값
+    def fingerprint(self):
+        """
+        Digest of the bounds and obstacles of the search space, independent of obstacle order and ids
+        Used to check that a saved tree is loaded into the map it was grown in
+        :return: str, hex digest
+        """
+        if self._fingerprint_version != self.obs.version:
+            h = hashlib.sha256()
+            h.update(np.asarray(self.dimension_lengths, dtype=float).tobytes())
+            boxes = self.obs.boxes()
+            h.update(np.ascontiguousarray(boxes[np.lexsort(boxes.T[::-1])]).tobytes())
+            for digest in sorted(shape_digest(shape) for shape in self.obs.shapes.values()):
+                h.update(digest)
+            self._fingerprint = h.hexdigest()
+            self._fingerprint_version = self.obs.version
+        return self._fingerprint
+
+    @property
+    def grid(self):
+        """
+        Occupancy grid of the obstacles, rasterized again whenever obstacles change
+        :return: OccupancyGrid
+        """
+        if self._grid is None:
+            self._grid = OccupancyGrid(self.dimension_lengths, self.resolution, self.grid_file, self.grid_key(),
+                                       self._grid_readonly)
+        if self._grid_version != self.obs.version:
+            key = self.grid_key()
+            # 파일에 이미 같은 맵의 그리드가 있으면 다시 그리지 않는다.
+            if self._grid.key != key:
+                # 읽기 전용으로 연 파일은 건드리지 않고, 자기만의 메모리 그리드로 바꾼다.
+                if self._grid.readonly:
+                    self._grid = OccupancyGrid(self.dimension_lengths, self.resolution)
+                self._grid.rasterize(self.obs.boxes(), self.obs.shapes.values(), key)
+            self._grid_version = self.obs.version
+        return self._grid
+
+    def grid_key(self):
+        """
+        :return: str identifying the grid of this map, the fingerprint and the grid resolution
+        """
+        return "{} {!r}".format(self.fingerprint(), float(self.resolution))
+
     # 함수 발동 : rrt_base.py에 있는 new_and_near에서 호출한다.
     # 입력 변수 : 없다.
     # 함수 내용
-    # if self.obstacle_free(x): 장애물 내부가 아닐 때까지 계속해서 샘플링
-    # 반환 변수 : self.obs.count(x)가 0인지 아닌지를 체크
+    # 후보들을 한 묶음씩 뽑아서 장애물 내부가 아닌 것만 모아두고 하나씩 꺼내준다.
+    # 반환 변수 : 장애물 내부가 아닌 랜덤 좌표
     def sample_free(self):
         """
         Sample a location within X_free
         :return: random location within X_free
         """
-        while True:  
-            x = self.sample()
-            if self.obstacle_free(x):
-                return x
+        return self.sampler.sample()
+
+    @property
+    def acceptance_rate(self):
+        """
+        Fraction of candidates drawn by sample_free that were within X_free
+        Planners draw from their own sampler, read their acceptance_rate (or that of their PlannerStats) instead
+        :return: acceptance rate, None if nothing has been sampled yet
+        """
+        return self.sampler.acceptance_rate
 
     # 함수 발동 : rrt_base.py에서의 def connect_to_point에서 호출한다.
     # 입력 변수 : 가장 가까운 점(start), 새로 생성된 내분점(end), r(rrt_2d.py의 r)
     # 함수 내용
-    # 선이 장애물과 교차하는지를 확인
-    # 반환 변수 : self.obs.count(x)가 0인지 아닌지를 체크
-    def collision_free(self, start, end, r):
+    # 선분을 감싸는 박스로 rtree에 한 번만 물어보고, 후보 장애물들과는 slab test로 한꺼번에 교차를 확인
+    # 반환 변수 : 선분이 어떤 장애물과도 만나지 않으면 true
+    def collision_free(self, start, end, r=None):
         """
         Check if a line segment intersects an obstacle
+        Exact segment-vs-box test with the rtree backend, does not depend on a sampling resolution.
+        The grid backend looks up cells every half cell along the segment instead
+        :param start: start of line segment
+        :param end: end of line segment
+        :param r: unused, kept for compatibility with resolution-based callers
         :return: True if line segment does not intersect an obstacle, False otherwise
         """
-        # src.utilities.geometry.py 안에 들어있는 es_points_along_line에 보낸다.
-        # points들을 생산
-        points = es_points_along_line(start, end, r)
-        # map으로 데이터를 묶어준다음, all 내장함수를 사용해서 bool형태로 반환받는다.
-        coll_free = all(map(self.obstacle_free, points))
-        return coll_free
+        key = self.edge_cache.key(start, end)
+        free = self.edge_cache.get(key, self.obs.version)
+        if free is None:
+            free = self._collision_free(start, end)
+            self.edge_cache.put(key, free)
+        return free
+
+    def _collision_free(self, start, end):
+        if self.backend == "grid":
+            return bool(self.grid.segments_free([start], [end])[0])
+        if self.clearance_field is not None:
+            t = self.clearance_field.trace_one(start, end)
+            if t >= 1:
+                return True
+            # only the part the field could not clear needs the exact test
+            start = tuple(np.add(start, t * np.subtract(end, start)))
+        candidates = self.segment_candidates(start, end)
+        if len(candidates) > 0 and segments_intersect_boxes([start], [end], candidates).any():
+            return False
+        shapes = self.shape_candidates(start, end)
+        if not shapes:
+            return True
+        starts, ends = np.array([start], dtype=float), np.array([end], dtype=float)
+        return not any(shape.intersects(starts, ends)[0] for shape in shapes)
+
+    # 함수 발동 : rrt_connect.py의 connect, rrt_base.py의 new_and_near(steer_to_collision일 때)에서 호출한다.
+    # 입력 변수 : 선분의 시작점(start), 끝점(end)
+    # 함수 내용
+    # 한 걸음씩 steer하면서 검사하지 않고, 선분이 처음 장애물에 닿는 t를 한 번에 구해서 그보다 margin만큼 앞의 점을 준다.
+    # 반환 변수 : start에서 장애물에 닿지 않고 갈 수 있는 선분 위의 가장 먼 점
+    def free_prefix(self, start, end, margin=FREE_PREFIX_MARGIN):
+        """
+        Furthest point along a line segment that can be reached from start without touching an obstacle
+        The segment from start to that point is remembered as obstacle-free, so checking it again is a cache hit
+        :param start: start of line segment
+        :param end: end of line segment
+        :param margin: distance to keep from the first obstacle the segment touches
+        :return: tuple, end if the whole segment is obstacle-free, start if start is blocked
+        """
+        start, end = tuple(start), tuple(end)
+        key = self.edge_cache.key(start, end)
+        if self.edge_cache.get(key, self.obs.version):
+            return end
+        t = self._free_prefix(start, end, margin)
+        self.edge_cache.put(key, t >= 1)
+        if t >= 1:
+            return end
+        if t <= 0:
+            return start
+        x = tuple(a + t * (b - a) for a, b in zip(start, end))
+        self.edge_cache.put(self.edge_cache.key(start, x), True)
+        return x
+
+    def _free_prefix(self, start, end, margin):
+        if self.backend == "grid":
+            return self.grid.free_prefix(start, end)
+        if self.clearance_field is not None and self.clearance_field.trace_one(start, end) >= 1:
+            return 1.0
+        starts, ends = np.array([start], dtype=float), np.array([end], dtype=float)
+        t = np.inf  # parameter of the first contact with an obstacle
+        candidates = self.segment_candidates(start, end)
+        if len(candidates) > 0:
+            t_enter, t_exit = segment_box_intervals(starts, ends, candidates)
+            hit = t_enter <= t_exit
+            if hit.any():
+                t = float(t_enter[hit].min())
+        for shape in self.shape_candidates(start, end):
+            t = min(t, float(shape.enter(starts, ends)[0]))
+        if t > 1:
+            return 1.0
+        length = float(np.linalg.norm(ends - starts))
+        return max(t - margin / length, 0.0) if length > 0 else 0.0
+
+    # 함수 발동 : rrt_star.py의 rewire, connect_shortest_valid, rrt_star_bid.py의 connect_trees에서 호출한다.
+    # 입력 변수 : 선분의 시작점들(starts), 선분의 끝점들(ends)
+    # 함수 내용
+    # 선분들 전체를 감싸는 박스로 rtree에 한 번만 물어보고, 모든 선분 x 후보 장애물을 한꺼번에 확인
+    # 반환 변수 : 선분 별로 장애물과 만나지 않으면 true인 배열
+    def collision_free_many(self, starts, ends):
+        """
+        Check many line segments against obstacles in one vectorized call
+        :param starts: sequence of segment start points
+        :param ends: sequence of segment end points
+        :return: boolean array, True where the line segment does not intersect an obstacle
+        """
+        starts = np.asarray(starts, dtype=float).reshape(-1, self.dimensions)
+        ends = np.asarray(ends, dtype=float).reshape(-1, self.dimensions)
+        keys = [self.edge_cache.key(a, b) for a, b in zip(starts.tolist(), ends.tolist())]
+        cached = [self.edge_cache.get(key, self.obs.version) for key in keys]
+        free = np.array([True if c is None else c for c in cached], dtype=bool)
+        missing = np.array([c is None for c in cached], dtype=bool)
+        if missing.any():
+            free[missing] = self._collision_free_many(starts[missing], ends[missing])
+            for i in np.flatnonzero(missing):
+                self.edge_cache.put(keys[i], bool(free[i]))
+        return free
+
+    def _collision_free_many(self, starts, ends):
+        if self.backend == "grid":
+            return self.grid.segments_free(starts, ends)
+        if self.clearance_field is not None:
+            t = self.clearance_field.trace(starts, ends)
+            free = np.ones(len(starts), dtype=bool)
+            undecided = t < 1
+            if undecided.any():
+                starts, ends = starts[undecided], ends[undecided]
+                starts = starts + t[undecided, None] * (ends - starts)
+                free[undecided] = self.segments_free(starts, ends)
+            return free
+        return self.segments_free(starts, ends)
+
+    def segments_free(self, starts, ends):
+        """
+        Exact test of many line segments against the boxes and shapes in the obstacle index
+        :param starts: array of shape (m, d), start of each segment
+        :param ends: array of shape (m, d), end of each segment
+        :return: boolean array of shape (m,), True where the line segment does not intersect an obstacle
+        """
+        lower, upper = np.minimum(starts, ends).min(axis=0), np.maximum(starts, ends).max(axis=0)
+        candidates = self.segment_candidates(lower, upper)
+        free = np.ones(len(starts), dtype=bool)
+        if len(candidates) > 0:
+            free = ~segments_intersect_boxes(starts, ends, candidates).any(axis=1)
+        for shape in self.shape_candidates(lower, upper):
+            free &= ~shape.intersects(starts, ends)
+        return free
+
+    def segment_candidates(self, start, end):
+        """
+        Obstacles whose bounding boxes overlap the bounding box of a line segment
+        :param start: start of line segment
+        :param end: end of line segment
+        :return: array of candidate obstacles, one per row
+        """
+        bounds = tuple(map(min, start, end)) + tuple(map(max, start, end))
+        return self.obs.intersecting_boxes(bounds)
+
+    def shape_candidates(self, start, end):
+        """
+        Shapes whose bounding boxes overlap the bounding box of a line segment
+        :param start: start of line segment
+        :param end: end of line segment
+        :return: list of candidate shapes
+        """
+        if not self.obs.shapes:
+            return []
+        bounds = tuple(map(min, start, end)) + tuple(map(max, start, end))
+        return self.obs.intersecting_shapes(bounds)
+
+    @property
+    def clearance_field(self):
+        """
+        Clearance field used to sphere trace line segments, None if there is none or obstacles
+        changed since it was attached
+        :return: ClearanceField
+        """
+        if self._clearance_version != self.obs.version:
+            return None
+        return self._clearance_field
+
+    @clearance_field.setter
+    def clearance_field(self, field):
+        self._clearance_field = field
+        self._clearance_version = self.obs.version if field is not None else None
+
+    def build_clearance_field(self, resolution=1.0, max_distance=None):
+        """
+        Build a clearance field over the current obstacles and use it for collision checks
+        :param resolution: edge length of a grid cell of the field
+        :param max_distance: largest distance stored in the field, see ClearanceField
+        :return: ClearanceField, can be passed to other search spaces over the same obstacles
+        """
+        self.clearance_field = ClearanceField(self.dimension_lengths, self.obs.boxes(), resolution, max_distance,
+                                              self.obs.shapes.values())
+        return self.clearance_field
+
+    # 함수 발동 : 플래너가 안전 거리를 확인할 때 호출한다.
+    # 입력 변수 : 확인할 위치(x)
+    # 함수 내용
+    # clearance field가 있으면 배열에서 바로 읽고, 없으면 모든 장애물과의 거리를 계산
+    # 반환 변수 : 가장 가까운 장애물까지의 거리, 장애물 안이면 음수
+    def clearance(self, x):
+        """
+        Distance from a location to the nearest obstacle
+        With a clearance field this is a cheap lower bound, otherwise it is computed exactly
+        :param x: location
+        :return: distance to nearest obstacle, negative inside an obstacle
+        """
+        x = np.asarray(x, dtype=float).reshape(1, self.dimensions)
+        if self.clearance_field is not None:
+            return float(self.clearance_field.clearance(x)[0])
+        distance = signed_distance_to_boxes(x, self.obs.boxes())[0]
+        for shape in self.obs.shapes.values():
+            distance = min(distance, shape.distance(x)[0])
+        return float(distance)
 
     # 함수 발동 : def sample_free에서 호출한다.
     # 입력 변수
@@ -106,3 +500,31 @@ class SearchSpace(object):
         # print(tuple(x)) # (,)
 
         return tuple(x)
+
+
+def unpickle_search_space(args, clearance=None, grid_readonly=False):
+    """
+    Rebuild a pickled search space, see SearchSpace.__reduce__
+    :param args: SearchSpace constructor arguments
+    :param clearance: (resolution, max_distance) of the clearance field to build, None for no field
+    :param grid_readonly: if True, only map the grid_file read-only
+    :return: SearchSpace
+    """
+    X = SearchSpace(*args)
+    X._grid_readonly = grid_readonly
+    if clearance is not None:
+        X.build_clearance_field(*clearance)
+    return X
+
+
+def shape_digest(shape):
+    """
+    :param shape: Shape
+    :return: bytes, digest of the type and parameters of the shape
+    """
+    h = hashlib.sha256(type(shape).__name__.encode())
+    for name, value in sorted(vars(shape).items()):
+        if not name.startswith("_"):
+            h.update(name.encode())
+            h.update(np.asarray(value, dtype=float).tobytes())
+    return h.digest()
@@ -0,0 +1,294 @@
+# This file is subject to the terms and conditions defined in
+# file 'LICENSE', which is part of this source code package.
+
+from itertools import combinations
+
+import numpy as np
+
+from src.utilities.geometry import segment_box_intervals
+
+ENTER_BISECTIONS = 40  # halvings of the segment parameter when Shape.enter has no closed form
+
+
+def closest_on_segments(starts, ends, points):
+    """
+    Parameter of the point on each segment closest to the matching point
+    :param starts: array of shape (m, d), start of each segment
+    :param ends: array of shape (m, d), end of each segment
+    :param points: array of shape (m, d) or (d,)
+    :return: array of shape (m,), parameter in [0, 1] along each segment
+    """
+    v = ends - starts
+    vv = np.einsum("ij,ij->i", v, v)
+    t = np.einsum("ij,ij->i", points - starts, v) / np.where(vv > 0, vv, 1)
+    return np.clip(t, 0.0, 1.0)
+
+
+def segment_segment_distance(starts, ends, a, b):
+    """
+    Distance between line segments and one fixed segment
+    Closest points of two segments, see Ericson, Real-Time Collision Detection, 5.1.9
+    :param starts: array of shape (m, d), start of each segment
+    :param ends: array of shape (m, d), end of each segment
+    :param a: start of fixed segment
+    :param b: end of fixed segment
+    :return: array of shape (m,), distance between each segment and the fixed segment
+    """
+    d1 = ends - starts
+    d2 = b - a
+    r = starts - a
+    aa = np.einsum("ij,ij->i", d1, d1)
+    e = d2 @ d2
+    f = r @ d2
+    c = np.einsum("ij,ij->i", d1, r)
+    bb = d1 @ d2
+    if e == 0:
+        # fixed segment is a point
+        s = np.clip(-c / np.where(aa > 0, aa, 1), 0.0, 1.0)
+        t = np.zeros(len(starts))
+    else:
+        denom = aa * e - bb ** 2
+        s = np.where(denom > 0, np.clip((bb * f - c * e) / np.where(denom > 0, denom, 1), 0.0, 1.0), 0.0)
+        t = (bb * s + f) / e
+        s = np.where(t < 0, np.clip(-c / np.where(aa > 0, aa, 1), 0.0, 1.0), s)
+        s = np.where(t > 1, np.clip((bb - c) / np.where(aa > 0, aa, 1), 0.0, 1.0), s)
+        t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm(starts + s[:, None] * d1 - (a + t[:, None] * d2), axis=1)
+
+
+def normals_positively_span(A):
+    """
+    Whether nonnegative combinations of the rows of A give every vector, i.e. A x <= b is bounded for any b
+    Otherwise some direction u != 0 has A u <= 0. Either A has a null space, or such a u runs along an
+    extreme ray of the cone A u <= 0, which lies on the intersection of d - 1 of its facets
+    :param A: array of shape (k, d), facet normals
+    :return: True if the rows of A positively span R^d
+    """
+    k, dimensions = A.shape
+    if k <= dimensions or np.linalg.matrix_rank(A) < dimensions:
+        return False
+    rows = np.array(list(combinations(range(k), dimensions - 1)))
+    # last right singular vector of each set of d - 1 rows is orthogonal to all of them
+    _, sv, vt = np.linalg.svd(A[rows], full_matrices=True)
+    u = vt[:, -1, :][sv[:, -1] > 1e-12]
+    tolerance = 1e-9
+    return not (np.all(u @ A.T <= tolerance, axis=1).any() or np.all(u @ A.T >= -tolerance, axis=1).any())
+
+
+class Shape(object):
+    """
+    Obstacle that is not an axis-aligned box
+    bounds is its axis-aligned bounding box, which goes into the obstacle index for the broad phase.
+    contains, intersects, enter and distance are the exact narrow phase, vectorized over points or segments
+    """
+    bounds = None  # bounding box in form (min_1, ..., min_d, max_1, ..., max_d)
+
+    def contains(self, points):
+        """
+        :param points: array of shape (n, d)
+        :return: boolean array of shape (n,), True where the point is inside the shape
+        """
+        raise NotImplementedError
+
+    def intersects(self, starts, ends):
+        """
+        :param starts: array of shape (m, d), start of each segment
+        :param ends: array of shape (m, d), end of each segment
+        :return: boolean array of shape (m,), True where the segment touches the shape
+        """
+        raise NotImplementedError
+
+    def enter(self, starts, ends):
+        """
+        Parameter at which each segment first touches the shape
+        Bisection on intersects, as a prefix of a segment touches the shape once it is long enough to,
+        shapes with a closed form override it
+        :param starts: array of shape (m, d), start of each segment
+        :param ends: array of shape (m, d), end of each segment
+        :return: array of shape (m,), parameter in [0, 1] along each segment, inf where the segment misses
+        """
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        t = np.full(len(starts), np.inf)
+        hit = self.intersects(starts, ends)
+        if not hit.any():
+            return t
+        starts, v = starts[hit], ends[hit] - starts[hit]
+        lo, hi = np.zeros(len(starts)), np.ones(len(starts))
+        for _ in range(ENTER_BISECTIONS):
+            mid = (lo + hi) / 2
+            touches = self.intersects(starts, starts + mid[:, None] * v)
+            hi = np.where(touches, mid, hi)
+            lo = np.where(touches, lo, mid)
+        t[hit] = lo
+        return t
+
+    def distance(self, points):
+        """
+        Lower bound on the signed distance to the shape, negative inside
+        :param points: array of shape (n, d)
+        :return: array of shape (n,)
+        """
+        raise NotImplementedError
+
+
+class Sphere(Shape):
+    def __init__(self, center, radius):
+        """
+        Ball (disc in 2D)
+        :param center: center of sphere
+        :param radius: radius of sphere
+        """
+        if radius <= 0:
+            raise Exception("Sphere radius must be positive")
+        self.center = np.asarray(center, dtype=float)
+        self.radius = float(radius)
+        self.bounds = tuple((self.center - self.radius).tolist()) + tuple((self.center + self.radius).tolist())
+
+    def contains(self, points):
+        return self.distance(points) <= 0
+
+    def intersects(self, starts, ends):
+        t = closest_on_segments(starts, ends, self.center)
+        closest = starts + t[:, None] * (ends - starts)
+        return np.linalg.norm(closest - self.center, axis=1) <= self.radius
+
+    def enter(self, starts, ends):
+        # smaller root of |start + t v - center| = radius
+        v = ends - starts
+        w = starts - self.center
+        a = np.einsum("ij,ij->i", v, v)
+        b = np.einsum("ij,ij->i", v, w)
+        c = np.einsum("ij,ij->i", w, w) - self.radius ** 2
+        disc = b ** 2 - a * c
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (-b - np.sqrt(np.maximum(disc, 0.0))) / a
+        t = np.where(c <= 0, 0.0, t)  # start inside
+        return np.where((c <= 0) | ((disc >= 0) & (a > 0) & (t >= 0) & (t <= 1)), t, np.inf)
+
+    def distance(self, points):
+        return np.linalg.norm(np.asarray(points, dtype=float) - self.center, axis=1) - self.radius
+
+
+class Capsule(Shape):
+    def __init__(self, a, b, radius):
+        """
+        Points within radius of the segment from a to b, e.g. a cylinder with rounded caps
+        :param a: start of capsule axis
+        :param b: end of capsule axis
+        :param radius: radius of capsule
+        """
+        if radius <= 0:
+            raise Exception("Capsule radius must be positive")
+        self.a = np.asarray(a, dtype=float)
+        self.b = np.asarray(b, dtype=float)
+        self.radius = float(radius)
+        self.bounds = tuple((np.minimum(self.a, self.b) - self.radius).tolist()) + \
+            tuple((np.maximum(self.a, self.b) + self.radius).tolist())
+
+    def contains(self, points):
+        return self.distance(points) <= 0
+
+    def intersects(self, starts, ends):
+        return segment_segment_distance(starts, ends, self.a, self.b) <= self.radius
+
+    def distance(self, points):
+        points = np.asarray(points, dtype=float)
+        n = len(points)
+        a, b = np.broadcast_to(self.a, (n, len(self.a))), np.broadcast_to(self.b, (n, len(self.b)))
+        t = closest_on_segments(a, b, points)
+        return np.linalg.norm(points - (a + t[:, None] * (b - a)), axis=1) - self.radius
+
+
+class OrientedBox(Shape):
+    def __init__(self, center, half_extents, rotation):
+        """
+        Box rotated away from the coordinate axes
+        :param center: center of box
+        :param half_extents: half of the edge length along each box axis
+        :param rotation: orthonormal matrix whose columns are the box axes in world coordinates
+        """
+        self.center = np.asarray(center, dtype=float)
+        self.half_extents = np.asarray(half_extents, dtype=float)
+        self.rotation = np.asarray(rotation, dtype=float)
+        if np.any(self.half_extents <= 0):
+            raise Exception("Box half extents must be positive")
+        if not np.allclose(self.rotation.T @ self.rotation, np.eye(len(self.center))):
+            raise Exception("Box rotation must be orthonormal")
+        extent = np.abs(self.rotation) @ self.half_extents
+        self.bounds = tuple((self.center - extent).tolist()) + tuple((self.center + extent).tolist())
+        self._local_box = np.concatenate([-self.half_extents, self.half_extents])[None, :]
+
+    def to_local(self, points):
+        """
+        :param points: array of shape (n, d) in world coordinates
+        :return: array of shape (n, d) in box coordinates
+        """
+        return (np.asarray(points, dtype=float) - self.center) @ self.rotation
+
+    def contains(self, points):
+        return np.all(np.abs(self.to_local(points)) <= self.half_extents, axis=1)
+
+    def intersects(self, starts, ends):
+        t_enter, t_exit = segment_box_intervals(self.to_local(starts), self.to_local(ends), self._local_box)
+        return (t_enter <= t_exit)[:, 0]
+
+    def enter(self, starts, ends):
+        t_enter, t_exit = segment_box_intervals(self.to_local(starts), self.to_local(ends), self._local_box)
+        return np.where(t_enter <= t_exit, t_enter, np.inf)[:, 0]
+
+    def distance(self, points):
+        q = np.abs(self.to_local(points)) - self.half_extents
+        outside = np.linalg.norm(np.maximum(q, 0.0), axis=1)
+        return np.where(np.all(q <= 0, axis=1), q.max(axis=1), outside)
+
+
+class ConvexPolytope(Shape):
+    def __init__(self, A, b):
+        """
+        Bounded intersection of halfspaces A x <= b
+        :param A: array of shape (k, d), outward facet normals
+        :param b: array of shape (k,), facet offsets
+        """
+        A = np.asarray(A, dtype=float)
+        b = np.asarray(b, dtype=float)
+        norms = np.linalg.norm(A, axis=1)
+        if np.any(norms == 0):
+            raise Exception("Polytope facet normals must be non-zero")
+        self.A = A / norms[:, None]
+        self.b = b / norms
+
+        dimensions = A.shape[1]
+        if not normals_positively_span(self.A):
+            raise Exception("Polytope must be bounded, its facet normals must positively span the space")
+
+        # vertices are the feasible intersections of d facets
+        facets = np.array(list(combinations(range(len(self.A)), dimensions)))
+        M = self.A[facets]
+        regular = np.abs(np.linalg.det(M)) > 1e-12
+        vertices = np.linalg.solve(M[regular], self.b[facets[regular]][..., None])[..., 0]
+        vertices = vertices[np.all(vertices @ self.A.T <= self.b + 1e-9, axis=1)]
+        if len(vertices) == 0:
+            raise Exception("Polytope must be non-empty")
+        self.bounds = tuple(vertices.min(axis=0).tolist()) + tuple(vertices.max(axis=0).tolist())
+
+    def contains(self, points):
+        return np.all(np.asarray(points, dtype=float) @ self.A.T <= self.b, axis=1)
+
+    def intersects(self, starts, ends):
+        return self.enter(starts, ends) <= 1
+
+    def enter(self, starts, ends):
+        # clip each segment against every facet (Cyrus-Beck)
+        num = self.b - starts @ self.A.T
+        den = (ends - starts) @ self.A.T
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = num / den
+        t_enter = np.maximum(np.where(den < 0, t, -np.inf).max(axis=1), 0.0)
+        t_exit = np.minimum(np.where(den > 0, t, np.inf).min(axis=1), 1.0)
+        parallel_outside = np.any((den == 0) & (num < 0), axis=1)
+        return np.where((t_enter <= t_exit) & ~parallel_outside, t_enter, np.inf)
+
+    def distance(self, points):
+        # distance to the farthest facet plane, exact inside and a lower bound outside
+        return (np.asarray(points, dtype=float) @ self.A.T - self.b).max(axis=1)
@@ -54,3 +54,60 @@ def steer(start, goal, d):
     u = v / (np.sqrt(np.sum(v ** 2)))
     steered_point = start + u * d
     return tuple(steered_point)
+
+# 함수 발동 : geometry.py에서의 segments_intersect_boxes에서 호출한다.
+# 입력 변수 : 선분의 시작점들(starts), 선분의 끝점들(ends), 장애물 박스들(boxes)
+# 함수 내용 : slab test, 각 축마다 선분이 박스 안에 들어가 있는 t 구간을 구해서 교집합을 만든다.
+# 반환 변수 : 선분 x 박스 별로 들어가는 t(t_enter), 나오는 t(t_exit)
+def segment_box_intervals(starts, ends, boxes):
+    """
+    Parametric overlap of line segments with axis-aligned boxes (slab test)
+    :param starts: array of shape (m, d), start of each segment
+    :param ends: array of shape (m, d), end of each segment
+    :param boxes: array of shape (k, 2d), boxes in form (min_1, ..., min_d, max_1, ..., max_d)
+    :return: arrays t_enter, t_exit of shape (m, k), segment i overlaps box j on [t_enter, t_exit] of [0, 1],
+    no overlap if t_enter > t_exit
+    """
+    starts = np.asarray(starts, dtype=float)[:, None, :]
+    ends = np.asarray(ends, dtype=float)[:, None, :]
+    boxes = np.asarray(boxes, dtype=float)
+    dimensions = starts.shape[-1]
+    lo, hi = boxes[None, :, :dimensions], boxes[None, :, dimensions:]
+
+    v = ends - starts
+    parallel = v == 0
+    if not parallel.any():
+        inv = 1.0 / v
+        t_lo = (lo - starts) * inv
+        t_hi = (hi - starts) * inv
+        t_enter = np.maximum(np.minimum(t_lo, t_hi).max(axis=-1), 0.0)
+        t_exit = np.minimum(np.maximum(t_lo, t_hi).min(axis=-1), 1.0)
+        return t_enter, t_exit
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_lo = (lo - starts) / v
+        t_hi = (hi - starts) / v
+    # axes the segment does not move along either always or never overlap the box
+    t_near = np.where(parallel, -np.inf, np.minimum(t_lo, t_hi))
+    t_far = np.where(parallel, np.inf, np.maximum(t_lo, t_hi))
+    outside = np.any(parallel & ((starts < lo) | (starts > hi)), axis=-1)
+
+    t_enter = np.maximum(t_near.max(axis=-1), 0.0)
+    t_exit = np.minimum(t_far.min(axis=-1), 1.0)
+    t_exit[outside] = -np.inf
+    return t_enter, t_exit
+
+# 함수 발동 : search_space.py에서의 collision_free에서 호출한다.
+# 입력 변수 : 선분의 시작점들(starts), 선분의 끝점들(ends), 장애물 박스들(boxes)
+# 함수 내용 : 점을 찍어보지 않고 선분과 박스가 겹치는지 정확하게 계산
+# 반환 변수 : 선분 x 박스 별로 겹치면 True
+def segments_intersect_boxes(starts, ends, boxes):
+    """
+    Exact intersection test between line segments and closed axis-aligned boxes
+    :param starts: array of shape (m, d), start of each segment
+    :param ends: array of shape (m, d), end of each segment
+    :param boxes: array of shape (k, 2d), boxes in form (min_1, ..., min_d, max_1, ..., max_d)
+    :return: boolean array of shape (m, k), True where segment i touches box j
+    """
+    t_enter, t_exit = segment_box_intervals(starts, ends, boxes)
+    return t_enter <= t_exit
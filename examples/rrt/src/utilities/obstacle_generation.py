@@ -3,6 +3,8 @@ import uuid
 
 import numpy as np
 
+from src.search_space.shapes import Shape
+
 
 def generate_random_obstacles(X, start, end, n):
     """
@@ -13,7 +15,7 @@ def generate_random_obstacles(X, start, end, n):
     i = 0
     obstacles = []
     while i < n:
-        center = np.empty(len(X.dimension_lengths), np.float)
+        center = np.empty(len(X.dimension_lengths), float)
         scollision = True
         fcollision = True
         edge_lengths = []
@@ -35,8 +37,8 @@ def generate_random_obstacles(X, start, end, n):
                 fcollision = False
 
         # Check if any part of the obstacle is inside of another obstacle.
-        min_corner = np.empty(X.dimensions, np.float)
-        max_corner = np.empty(X.dimensions, np.float)
+        min_corner = np.empty(X.dimensions, float)
+        max_corner = np.empty(X.dimensions, float)
         for j in range(X.dimensions):
             min_corner[j] = center[j] - edge_lengths[j]
             max_corner[j] = center[j] + edge_lengths[j]
@@ -46,7 +48,7 @@ def generate_random_obstacles(X, start, end, n):
             continue
         i += 1
         obstacles.append(obstacle)
-        X.obs.add(uuid.uuid4(), tuple(obstacle), tuple(obstacle))
+        X.obs.add(uuid.uuid4().int >> 65, tuple(obstacle), tuple(obstacle))
 
     return obstacles
 
@@ -57,7 +59,10 @@ def generate_random_obstacles(X, start, end, n):
 def obstacle_generator(obstacles):
     """
     Add obstacles to r-tree
-    :param obstacles: list of obstacles
+    :param obstacles: list of obstacles, boxes or shapes (indexed by their bounding boxes)
     """
     for obstacle in obstacles:
-        yield (uuid.uuid4(), obstacle, obstacle)
+        if isinstance(obstacle, Shape):
+            yield (uuid.uuid4().int >> 65, obstacle.bounds, obstacle)
+        else:
+            yield (uuid.uuid4().int >> 65, obstacle, obstacle)